@@ -1,14 +1,97 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import itertools
 import json
 import os
+import shutil
 import subprocess
-from typing import Any, AsyncIterator, Dict, Optional
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# All wire encoding goes through these helpers: objects in, UTF-8 bytes out (and back).
+if orjson is not None:
+    _decode = orjson.loads
+    _encode = orjson.dumps
+
+    def _encode_frame(payload: Any) -> bytes:
+        """Serialise ``payload`` to a newline-terminated UTF-8 frame."""
+        return orjson.dumps(payload, option=orjson.OPT_APPEND_NEWLINE)
+
+else:
+    _decode = json.loads
+
+    def _encode(payload: Any) -> bytes:
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def _encode_frame(payload: Any) -> bytes:
+        """Serialise ``payload`` to a newline-terminated UTF-8 frame."""
+        return _encode(payload) + b"\n"
+
+
+# JSON-RPC envelopes with only the variable parts left to fill in.
+_CALL_FRAME = b'{"jsonrpc":"2.0","id":%d,"method":%s,"params":%s}\n'
+_NOTIFY_FRAME = b'{"jsonrpc":"2.0","method":%s,"params":%s}\n'
+_NOTIFY_BARE_FRAME = b'{"jsonrpc":"2.0","method":%s}\n'
+_RESULT_FRAME = b'{"jsonrpc":"2.0","id":%s,"result":%s}\n'
+_METHOD_BYTES: dict[str, bytes] = {}
+
+
+def _method_bytes(method: str) -> bytes:
+    encoded = _METHOD_BYTES.get(method)
+    if encoded is None:
+        encoded = _METHOD_BYTES[method] = _encode(method)
+    return encoded
+
+
+def _text_item(item: dict) -> dict[str, Any]:
+    return {"type": "text", "data": {"text": item.get("text", "")}}
+
+
+def _image_item(item: dict) -> dict[str, Any]:
+    return {"type": "image", "data": {"imageUrl": item.get("imageUrl") or item.get("image_url")}}
+
+
+def _local_image_item(item: dict) -> dict[str, Any]:
+    return {"type": "localImage", "data": {"path": item.get("path")}}
+
+
+# Hub-side item type -> app-server wire shape; unknown types are copied through.
+_ITEM_CONVERTERS: dict[Any, Callable[[dict], dict[str, Any]]] = {
+    "text": _text_item,
+    "image": _image_item,
+    "local_image": _local_image_item,
+    "localImage": _local_image_item,
+}
+
+_READ_CHUNK = 1 << 16
+# stderr/notification events live in a ring of this size; once full the
+# oldest are overwritten. Requests and unmatched responses are never dropped.
+_EVENT_RING_SIZE = 2000
+_PRIORITY_KINDS = frozenset({"request", "response"})
+# Outstanding calls live in a fixed slot array indexed by ``rid & _PENDING_MASK``.
+_PENDING_SLOTS = 1024
+_PENDING_MASK = _PENDING_SLOTS - 1
 
 
 def _supports_app_server(binary: str) -> bool:
+    resolved = shutil.which(binary) or binary
+    try:
+        mtime_ns = os.stat(resolved).st_mtime_ns
+    except OSError:
+        return False
+    return _probe_app_server(resolved, os.path.realpath(resolved), mtime_ns)
+
+
+@functools.lru_cache(maxsize=8)
+def _probe_app_server(binary: str, _realpath: str, _mtime_ns: int) -> bool:
+    """Run the ``app-server --help`` probe once per installed binary version."""
     try:
         subprocess.run(
             [binary, "app-server", "--help"],
@@ -22,6 +105,23 @@ def _supports_app_server(binary: str) -> bool:
     return True
 
 
+def _route_request(_client: "AppServerProcess", msg: dict) -> dict:
+    return {
+        "kind": "request",
+        "id": msg["id"],
+        "method": str(msg["method"]),
+        "params": msg.get("params") or {},
+    }
+
+
+def _route_notification(_client: "AppServerProcess", msg: dict) -> dict:
+    return {
+        "kind": "notification",
+        "method": str(msg["method"]),
+        "params": msg.get("params") or {},
+    }
+
+
 class AppServerProcess:
     """Run `codex app-server` and provide a small async client over stdio."""
 
@@ -36,33 +136,57 @@ class AppServerProcess:
         self.dangerous = dangerous
         self._app_server_available: Optional[bool] = None
         self.proc: Optional[asyncio.subprocess.Process] = None
-        self._events: asyncio.Queue[dict] = asyncio.Queue(maxsize=2000)
+        self._events: deque[dict] = deque(maxlen=_EVENT_RING_SIZE)
+        self._priority_events: deque[dict] = deque()
+        self._events_ready = asyncio.Event()
+        self._events_closed = False
+        self.dropped_events = 0
         self._id_iter = itertools.count(1)
-        self._pending: Dict[int, asyncio.Future] = {}
+        self._pending_slots: list[Optional[tuple[int, asyncio.Future]]] = [None] * _PENDING_SLOTS
+        # Only used when more than _PENDING_SLOTS calls are in flight and a slot is taken.
+        self._pending_overflow: Dict[int, asyncio.Future] = {}
         self._pump_tasks: list[asyncio.Task] = []
+        self._send_q: deque[tuple[bytes, asyncio.Future]] = deque()
+        self._send_ready = asyncio.Event()
+        # Set by stop(); frames written afterwards fail instead of waiting on a dead writer.
+        self._send_closed = False
 
     async def start(self) -> None:
-        self._app_server_available = _supports_app_server(self.codex_bin)
-        if not self._app_server_available:
+        # Probe and spawn concurrently; the spawned process is discarded if the probe fails.
+        args = [self.codex_bin, "app-server"]
+        probe, spawned = await asyncio.gather(
+            asyncio.to_thread(_supports_app_server, self.codex_bin),
+            asyncio.create_subprocess_exec(
+                *args,
+                cwd=self.cwd,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=1 << 20,
+            ),
+            return_exceptions=True,
+        )
+        self._app_server_available = probe is True
+        if not self._app_server_available or isinstance(spawned, BaseException):
+            if not isinstance(spawned, BaseException):
+                try:
+                    spawned.kill()
+                    await spawned.wait()
+                except Exception:
+                    pass
             raise RuntimeError(
                 "Unable to run 'codex app-server'; ensure the Codex CLI is installed and on PATH."
             )
-
-        args = [self.codex_bin, "app-server"]
-        self.proc = await asyncio.create_subprocess_exec(
-            *args,
-            cwd=self.cwd,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            limit=1 << 16,
-        )
+        self.proc = spawned
+        self._send_closed = False
         self._pump_tasks = [
             asyncio.create_task(self._pump_stdout(), name="app-server-stdout"),
             asyncio.create_task(self._pump_stderr(), name="app-server-stderr"),
+            asyncio.create_task(self._send_loop(), name="app-server-stdin"),
         ]
 
     async def stop(self) -> None:
+        self._send_closed = True
         if self.proc:
             try:
                 if self.proc.stdin and not self.proc.stdin.is_closing():
@@ -78,50 +202,58 @@ class AppServerProcess:
                     pass
         for task in self._pump_tasks:
             task.cancel()
+        self._fail_pending_sends(RuntimeError("app-server stopped"))
 
     async def _pump_stdout(self) -> None:
         assert self.proc and self.proc.stdout
+        buf = bytearray()
         try:
             while True:
-                line = await self.proc.stdout.readline()
-                if not line:
+                chunk = await self.proc.stdout.read(_READ_CHUNK)
+                if not chunk:
                     break
-                raw = line.decode(errors="ignore").strip()
-                if not raw:
-                    continue
-                try:
-                    msg = json.loads(raw)
-                except json.JSONDecodeError:
-                    await self._events.put({"kind": "unknown", "payload": raw})
-                    continue
-                if "id" in msg and ("result" in msg or "error" in msg):
-                    future = self._pending.pop(msg["id"], None)
-                    if future and not future.done():
-                        future.set_result(msg)
-                    else:
-                        await self._events.put({"kind": "response", **msg})
-                elif "id" in msg and "method" in msg:
-                    await self._events.put(
-                        {
-                            "kind": "request",
-                            "id": msg.get("id"),
-                            "method": str(msg.get("method")),
-                            "params": msg.get("params") or {},
-                        }
-                    )
-                elif "method" in msg:
-                    await self._events.put(
-                        {
-                            "kind": "notification",
-                            "method": str(msg.get("method")),
-                            "params": msg.get("params") or {},
-                        }
-                    )
-                else:
-                    await self._events.put({"kind": "unknown", "payload": msg})
+                buf += chunk
+                start = 0
+                while (nl := buf.find(b"\n", start)) != -1:
+                    if nl > start:
+                        event = self._route_frame(buf[start:nl])
+                        if event is not None:
+                            self._push_event(event)
+                    start = nl + 1
+                del buf[:start]
+            if buf:
+                event = self._route_frame(buf)
+                if event is not None:
+                    self._push_event(event)
         except asyncio.CancelledError:
             return
 
+    def _route_frame(self, frame: bytes | bytearray) -> Optional[dict]:
+        """Decode one stdout frame, resolve pending calls, and return any event to queue."""
+        # Both JSON decoders accept bytes and ignore surrounding whitespace, so only
+        # keepalive/blank frames need a check before parsing.
+        if not frame or frame.isspace():
+            return None
+        try:
+            msg = _decode(frame)
+        except ValueError:
+            return {"kind": "unknown", "payload": frame.decode(errors="ignore").strip()}
+        if type(msg) is not dict:
+            return {"kind": "unknown", "payload": msg}
+        flags = (("id" in msg) << 2) | (("result" in msg or "error" in msg) << 1) | ("method" in msg)
+        route = _ROUTES.get(flags)
+        if route is None:
+            return {"kind": "unknown", "payload": msg}
+        return route(self, msg)
+
+    def _route_response(self, msg: dict) -> Optional[dict]:
+        future = self._pop_pending(msg["id"])
+        if future is not None and not future.done():
+            future.set_result(msg)
+            return None
+        # Only unmatched responses (late, cancelled, or foreign ids) pay for the event copy.
+        return {"kind": "response", **msg}
+
     async def _pump_stderr(self) -> None:
         assert self.proc and self.proc.stderr
         try:
@@ -130,16 +262,51 @@ class AppServerProcess:
                 if not line:
                     break
                 text = line.decode(errors="ignore").rstrip("\n")
-                await self._events.put({"kind": "stderr", "line": text})
+                self._push_event({"kind": "stderr", "line": text})
         except asyncio.CancelledError:
             return
 
+    def _add_pending(self, rid: int, fut: asyncio.Future) -> None:
+        slot = rid & _PENDING_MASK
+        if self._pending_slots[slot] is None:
+            self._pending_slots[slot] = (rid, fut)
+        else:
+            self._pending_overflow[rid] = fut
+
+    def _pop_pending(self, rid: Any) -> Optional[asyncio.Future]:
+        if type(rid) is not int:
+            return None
+        slot = rid & _PENDING_MASK
+        entry = self._pending_slots[slot]
+        if entry is not None and entry[0] == rid:
+            self._pending_slots[slot] = None
+            return entry[1]
+        if self._pending_overflow:
+            return self._pending_overflow.pop(rid, None)
+        return None
+
+    def _push_event(self, event: Optional[dict]) -> None:
+        if event is None:
+            self._events_closed = True
+        elif event.get("kind") in _PRIORITY_KINDS:
+            self._priority_events.append(event)
+        else:
+            if len(self._events) == _EVENT_RING_SIZE:
+                self.dropped_events += 1
+            self._events.append(event)
+        self._events_ready.set()
+
     async def events(self) -> AsyncIterator[dict]:
         while True:
-            ev = await self._events.get()
-            if ev is None:
-                break
-            yield ev
+            while self._priority_events or self._events:
+                if self._priority_events:
+                    yield self._priority_events.popleft()
+                else:
+                    yield self._events.popleft()
+            if self._events_closed:
+                return
+            self._events_ready.clear()
+            await self._events_ready.wait()
 
     async def call(self, method: str, params: Optional[dict] = None, timeout: float = 60.0) -> dict:
         if not self.proc or not self.proc.stdin:
@@ -147,19 +314,13 @@ class AppServerProcess:
         rid = next(self._id_iter)
         loop = asyncio.get_running_loop()
         fut: asyncio.Future = loop.create_future()
-        self._pending[rid] = fut
-        payload = {
-            "jsonrpc": "2.0",
-            "id": rid,
-            "method": method,
-            "params": params or {},
-        }
-        self.proc.stdin.write((json.dumps(payload, ensure_ascii=False) + "\n").encode())
-        await self.proc.stdin.drain()
+        self._add_pending(rid, fut)
+        frame = _CALL_FRAME % (rid, _method_bytes(method), _encode(params or {}))
         try:
+            await self._write_frame(frame)
             response = await asyncio.wait_for(fut, timeout=timeout)
         finally:
-            self._pending.pop(rid, None)
+            self._pop_pending(rid)
 
         if "error" in response:
             raise RuntimeError(f"{method} failed: {response['error']}")
@@ -168,18 +329,68 @@ class AppServerProcess:
     async def _write_json(self, payload: dict) -> None:
         if not self.proc or not self.proc.stdin:
             raise RuntimeError("app-server not started")
-        line = json.dumps(payload, ensure_ascii=False) + "\n"
-        self.proc.stdin.write(line.encode())
-        await self.proc.stdin.drain()
+        await self._write_frame(_encode_frame(payload))
+
+    async def _write_frame(self, frame: bytes) -> None:
+        """Queue ``frame`` for the stdin writer and wait until it has been drained."""
+        if self._send_closed:
+            raise RuntimeError("app-server stopped")
+        done: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._send_q.append((frame, done))
+        self._send_ready.set()
+        await done
+
+    async def _send_loop(self) -> None:
+        """Coalesce queued frames into a single write + drain per wake-up."""
+        assert self.proc and self.proc.stdin
+        batch: list[tuple[bytes, asyncio.Future]] = []
+        try:
+            while True:
+                await self._send_ready.wait()
+                self._send_ready.clear()
+                batch = list(self._send_q)
+                self._send_q.clear()
+                if not batch:
+                    continue
+                try:
+                    if len(batch) == 1:
+                        self.proc.stdin.write(batch[0][0])
+                    else:
+                        self.proc.stdin.write(b"".join([frame for frame, _ in batch]))
+                    await self.proc.stdin.drain()
+                except Exception as exc:
+                    for _, done in batch:
+                        if not done.done():
+                            done.set_exception(exc)
+                    continue
+                for _, done in batch:
+                    if not done.done():
+                        done.set_result(None)
+        except asyncio.CancelledError:
+            for _, done in batch:
+                if not done.done():
+                    done.set_exception(RuntimeError("app-server stopped"))
+            return
+
+    def _fail_pending_sends(self, exc: BaseException) -> None:
+        while self._send_q:
+            _, done = self._send_q.popleft()
+            if not done.done():
+                done.set_exception(exc)
 
     async def notify(self, method: str, params: Optional[dict] = None) -> None:
-        payload: dict[str, Any] = {"jsonrpc": "2.0", "method": method}
-        if params is not None:
-            payload["params"] = params
-        await self._write_json(payload)
+        if not self.proc or not self.proc.stdin:
+            raise RuntimeError("app-server not started")
+        if params is None:
+            frame = _NOTIFY_BARE_FRAME % _method_bytes(method)
+        else:
+            frame = _NOTIFY_FRAME % (_method_bytes(method), _encode(params))
+        await self._write_frame(frame)
 
     async def respond(self, request_id: Any, result: dict) -> None:
-        await self._write_json({"jsonrpc": "2.0", "id": request_id, "result": result})
+        if not self.proc or not self.proc.stdin:
+            raise RuntimeError("app-server not started")
+        await self._write_frame(_RESULT_FRAME % (_encode(request_id), _encode(result)))
 
     async def respond_error(self, request_id: Any, code: int, message: str) -> None:
         await self._write_json(
@@ -243,36 +454,19 @@ class AppServerProcess:
         return conv_id
 
     async def send_message(self, conversation_id: str, items: list[dict]) -> dict:
-        converted_items: list[dict[str, Any]] = []
-        for item in items:
-            kind = item.get("type")
-            if kind == "text":
-                converted_items.append(
-                    {
-                        "type": "text",
-                        "data": {"text": item.get("text", "")},
-                    }
-                )
-            elif kind == "image":
-                image_url = item.get("imageUrl") or item.get("image_url")
-                converted_items.append(
-                    {
-                        "type": "image",
-                        "data": {"imageUrl": image_url},
-                    }
-                )
-            elif kind in {"local_image", "localImage"}:
-                converted_items.append(
-                    {
-                        "type": "localImage",
-                        "data": {"path": item.get("path")},
-                    }
-                )
-            else:
-                converted_items.append(dict(item))
-
+        converted_items = [_ITEM_CONVERTERS.get(item.get("type"), dict)(item) for item in items]
         params = {
             "conversationId": conversation_id,
             "items": converted_items,
         }
         return await self.call("sendUserMessage", params=params, timeout=600.0)
+
+
+# Frame routing keyed on which of id / result|error / method are present (bits 2, 1, 0).
+_ROUTES: dict[int, Callable[[AppServerProcess, dict], Optional[dict]]] = {
+    0b110: AppServerProcess._route_response,
+    0b111: AppServerProcess._route_response,
+    0b101: _route_request,
+    0b001: _route_notification,
+    0b011: _route_notification,
+}
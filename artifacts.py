@@ -1,19 +1,70 @@
 """Simple append-only artifact store for text blobs."""
 from __future__ import annotations
 
+import asyncio
+import itertools
 import json
 import os
+import secrets
+import threading
 import time
-import uuid
-from typing import Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
 
 ART_DIRNAME = os.path.join(".orch", "artifacts")
 INDEX_BASENAME = "index.jsonl"
 
+# Index records are buffered and written in one append once this many bytes
+# are pending or the flush delay elapses, whichever comes first.
+_INDEX_FLUSH_BYTES = 8 * 1024
+_INDEX_FLUSH_DELAY = 0.05
+
+
+class _IndexBuffer:
+    """Write-combining buffer in front of a long-lived O_APPEND index descriptor."""
+
+    __slots__ = ("fd", "pending", "lock", "timer")
+
+    def __init__(self, fd: int) -> None:
+        self.fd = fd
+        self.pending = bytearray()
+        self.lock = threading.Lock()
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+_INDEX_BUFFERS: Dict[str, _IndexBuffer] = {}
+_ENSURED_DIRS: Set[str] = set()
+
+
+def _new_id_prefix() -> str:
+    return f"{int(time.time())}-{os.getpid():x}-{secrets.token_hex(4)}"
+
+
+# Artifact ids are a per-process random prefix plus a counter.
+_ART_PREFIX = _new_id_prefix()
+_ART_COUNTER = itertools.count(1)
+
+
+def _reset_id_prefix() -> None:
+    global _ART_PREFIX, _ART_COUNTER
+    _ART_PREFIX = _new_id_prefix()
+    _ART_COUNTER = itertools.count(1)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_id_prefix)
+
 
 def _ensure_dir(root: str) -> str:
     path = os.path.join(root, ART_DIRNAME)
-    os.makedirs(path, exist_ok=True)
+    if path not in _ENSURED_DIRS:
+        # makedirs(exist_ok=True) is idempotent, so racing threads are harmless here.
+        os.makedirs(path, exist_ok=True)
+        _ENSURED_DIRS.add(path)
     return path
 
 
@@ -25,24 +76,146 @@ def _blob_path(root: str, art_id: str) -> str:
     return os.path.join(_ensure_dir(root), f"{art_id}.txt")
 
 
-def store_text(root: str, kind: str, body: str, meta: Optional[dict] = None) -> str:
-    """Persist a text artifact and return its identifier."""
+def _encode_record(record: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _index_buffer(root: str) -> _IndexBuffer:
+    path = _index_path(root)
+    buf = _INDEX_BUFFERS.get(path)
+    if buf is None:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        buf = _INDEX_BUFFERS[path] = _IndexBuffer(fd)
+    return buf
+
+
+def _flush_buffer(buf: _IndexBuffer) -> None:
+    # A pending timer is left to fire on its own loop (cancelling it from another
+    # thread is unsafe); it then finds nothing, or only newer records, to write.
+    with buf.lock:
+        data = bytes(buf.pending)
+        buf.pending.clear()
+        if data:
+            _write_all(buf.fd, data)
+
+
+def _on_flush_timer(buf: _IndexBuffer) -> None:
+    with buf.lock:
+        buf.timer = None
+    _flush_buffer(buf)
+
+
+def _schedule_flush(buf: _IndexBuffer) -> None:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # No event loop on this thread to defer to; write through immediately.
+        _flush_buffer(buf)
+        return
+    with buf.lock:
+        if buf.timer is None:
+            buf.timer = loop.call_later(_INDEX_FLUSH_DELAY, _on_flush_timer, buf)
+
+
+def flush(root: Optional[str] = None) -> None:
+    """Write out buffered index records (for ``root``, or all roots) and fsync them."""
+    if root is None:
+        targets = list(_INDEX_BUFFERS.values())
+    else:
+        buf = _INDEX_BUFFERS.get(os.path.join(root, ART_DIRNAME, INDEX_BASENAME))
+        targets = [buf] if buf else []
+    for buf in targets:
+        _flush_buffer(buf)
+        try:
+            os.fsync(buf.fd)
+        except OSError:
+            pass
+
+
+def close() -> None:
+    """Flush buffered index records and close the cached descriptors."""
+    flush()
+    while _INDEX_BUFFERS:
+        _, buf = _INDEX_BUFFERS.popitem()
+        try:
+            os.close(buf.fd)
+        except OSError:
+            pass
+
+
+def _store_blob(root: str, kind: str, body: str, meta: Optional[dict], buf: _IndexBuffer) -> Tuple[str, bool]:
+    """Write one blob and buffer its index record; returns (id, buffer is full)."""
     now = int(time.time())
-    art_id = f"{now}-{uuid.uuid4().hex[:8]}"
-    with open(_blob_path(root, art_id), "w", encoding="utf-8") as handle:
-        handle.write(body or "")
+    art_id = f"{_ART_PREFIX}-{next(_ART_COUNTER):08x}"
+    data = body.encode("utf-8") if isinstance(body, str) else (body or b"")
+    fd = os.open(_blob_path(root, art_id), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    try:
+        _write_all(fd, data)
+    finally:
+        os.close(fd)
     record = {"id": art_id, "kind": kind, "ts": now, "meta": meta or {}}
-    with open(_index_path(root), "a", encoding="utf-8") as index:
-        index.write(json.dumps(record, ensure_ascii=False) + "\n")
+    with buf.lock:
+        buf.pending += _encode_record(record)
+        full = len(buf.pending) >= _INDEX_FLUSH_BYTES
+    return art_id, full
+
+
+def store_text(root: str, kind: str, body: str, meta: Optional[dict] = None) -> str:
+    """Persist a text artifact and return its identifier."""
+    buf = _index_buffer(root)
+    art_id, full = _store_blob(root, kind, body, meta, buf)
+    if full:
+        _flush_buffer(buf)
+    else:
+        _schedule_flush(buf)
     return art_id
 
 
+def store_texts(root: str, items: Iterable[Tuple[str, str, Optional[dict]]]) -> List[Optional[str]]:
+    """Persist several (kind, body, meta) artifacts, appending their index records in one write.
+
+    Meant for worker threads: no event-loop timer is involved. A failed item yields None.
+    """
+    buf = _index_buffer(root)
+    ids: List[Optional[str]] = []
+    for kind, body, meta in items:
+        try:
+            art_id, full = _store_blob(root, kind, body, meta, buf)
+        except OSError:
+            ids.append(None)
+            continue
+        ids.append(art_id)
+        if full:
+            _flush_buffer(buf)
+    _flush_buffer(buf)
+    return ids
+
+
 def load_text(root: str, art_id: str, max_chars: Optional[int] = None) -> Tuple[str, int]:
-    """Load a stored text artifact returning (text, total_length)."""
+    """Load a stored text artifact returning (text, total_length).
+
+    When ``max_chars`` cuts the text short only a bounded prefix of the blob is read,
+    and ``total_length`` is the blob's size in bytes rather than characters.
+    """
     path = _blob_path(root, art_id)
-    with open(path, "r", encoding="utf-8") as handle:
-        data = handle.read()
-    total = len(data)
-    if max_chars is not None and total > max_chars:
-        data = data[:max_chars]
-    return data, total
+    if max_chars is None:
+        with open(path, "r", encoding="utf-8") as handle:
+            data = handle.read()
+        return data, len(data)
+    size = os.stat(path).st_size
+    # A UTF-8 character is at most 4 bytes, so this prefix always holds max_chars characters.
+    limit = max(0, max_chars) * 4
+    with open(path, "rb") as handle:
+        raw = handle.read(limit)
+    data = raw.decode("utf-8", errors="ignore")
+    total = len(data) if len(raw) >= size else size
+    return data[:max_chars], total
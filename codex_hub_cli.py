@@ -4,13 +4,21 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import contextlib
+import functools
+import itertools
 import os
+import re
+import select
+import shutil
 import subprocess
 import sys
 import threading
-from typing import Optional
+import types
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Mapping, Optional
 
-from codex_hub_core import Hub, install_signal_handlers
+from codex_hub_core import Hub, configure_event_loop, install_signal_handlers
 
 try:
     import github_sync
@@ -18,9 +26,20 @@ except ImportError:  # pragma: no cover - optional dependency
     github_sync = None
 
 
+# Upper bound on events rendered per stdout write in the CLI event pump.
+EVENT_BATCH_MAX = 256
+
+# Shared read-only stand-in for events without a payload.
+_EMPTY_PAYLOAD: Mapping[str, Any] = types.MappingProxyType({})
+# ASCII line boundaries other than "\n" that str.splitlines() also honours.
+_EXTRA_LINE_BREAKS_RE = re.compile(r"[\r\x0b\x0c\x1c-\x1e]")
+
+
 class Palette:
     """Simple colour palette manager with optional ANSI output."""
 
+    __slots__ = ("enabled", "colors", "reset", "_wrap", "_wrap_unknown")
+
     def __init__(self, enabled: bool) -> None:
         self.enabled = enabled
         self.colors = {
@@ -34,22 +53,51 @@ class Palette:
             "muted": "\x1b[38;5;244m",
         }
         self.reset = "\x1b[0m"
+        # (open, close) escape pairs per colour key, resolved once.
+        self._wrap = {
+            key: ((code, self.reset) if enabled else ("", "")) for key, code in self.colors.items()
+        }
+        self._wrap_unknown = ("", self.reset if enabled else "")
+
+    def wrap(self, key: str) -> tuple[str, str]:
+        return self._wrap.get(key, self._wrap_unknown)
 
     def c(self, key: str) -> str:
-        if not self.enabled:
-            return ""
-        return self.colors.get(key, "")
+        return self._wrap.get(key, self._wrap_unknown)[0]
 
     def r(self) -> str:
-        return self.reset if self.enabled else ""
+        return self._wrap_unknown[1]
+
+
+STDIN_POLL_INTERVAL = 0.25
 
 
-class StdinBridge:
+class _LineSource:
+    """Pending input lines plus a wakeup flag, consumed on the event loop thread."""
+
+    def __init__(self) -> None:
+        self._lines: deque[str] = deque()
+        self._ready = asyncio.Event()
+
+    def _push(self, lines: list[str]) -> None:
+        self._lines.extend(lines)
+        self._ready.set()
+
+    async def next_lines(self) -> list[str]:
+        """Wait for input, then return every line received so far."""
+        await self._ready.wait()
+        lines = list(self._lines)
+        self._lines.clear()
+        self._ready.clear()
+        return lines
+
+
+class StdinBridge(_LineSource):
     """Bridge blocking stdin reads into the asyncio event loop."""
 
     def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        super().__init__()
         self.loop = loop
-        self.queue: asyncio.Queue[str] = asyncio.Queue()
         self._stop = threading.Event()
         self._thr = threading.Thread(target=self._run, daemon=True)
 
@@ -60,12 +108,122 @@ class StdinBridge:
         self._stop.set()
 
     def _run(self) -> None:
+        if os.name != "posix":
+            # select() only handles sockets on Windows; keep the blocking readline.
+            self._run_readline()
+            return
+        try:
+            fd = sys.stdin.fileno()
+        except (AttributeError, OSError, ValueError):
+            self._run_readline()
+            return
+        buf = bytearray()
+        while not self._stop.is_set():
+            try:
+                ready, _, _ = select.select([fd], [], [], STDIN_POLL_INTERVAL)
+                if not ready:
+                    continue
+                chunk = os.read(fd, 4096)
+            except InterruptedError:
+                continue
+            except (OSError, ValueError):
+                chunk = b""
+            if not chunk:
+                lines = [buf.decode("utf-8", errors="replace")] if buf else []
+                lines.append(":quit")
+                self.loop.call_soon_threadsafe(self._push, lines)
+                return
+            buf += chunk
+            start = 0
+            lines = []
+            while (nl := buf.find(b"\n", start)) != -1:
+                lines.append(buf[start:nl].decode("utf-8", errors="replace"))
+                start = nl + 1
+            if lines:
+                del buf[:start]
+                self.loop.call_soon_threadsafe(self._push, lines)
+
+    def _run_readline(self) -> None:
         while not self._stop.is_set():
             line = sys.stdin.readline()
             if not line:
-                self.loop.call_soon_threadsafe(self.queue.put_nowait, ":quit")
+                self.loop.call_soon_threadsafe(self._push, [":quit"])
                 break
-            self.loop.call_soon_threadsafe(self.queue.put_nowait, line.rstrip("\n"))
+            self.loop.call_soon_threadsafe(self._push, [line.rstrip("\n")])
+
+
+class StdinReader(_LineSource):
+    """Read stdin on the event loop thread via ``loop.add_reader`` (POSIX only)."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, fd: int = 0) -> None:
+        super().__init__()
+        self.loop = loop
+        self.fd = fd
+        self._buf = bytearray()
+        self._active = False
+        self._was_blocking = True
+
+    def start(self) -> None:
+        # uvloop switches a watched fd to O_NONBLOCK; on a TTY that also changes stdout, so stop() undoes it.
+        self._was_blocking = os.get_blocking(self.fd)
+        try:
+            self.loop.add_reader(self.fd, self._on_readable)
+        except BaseException:
+            self._restore_blocking()
+            raise
+        self._active = True
+
+    def stop(self) -> None:
+        if self._active:
+            self._active = False
+            self.loop.remove_reader(self.fd)
+            self._restore_blocking()
+
+    def _restore_blocking(self) -> None:
+        try:
+            if os.get_blocking(self.fd) != self._was_blocking:
+                os.set_blocking(self.fd, self._was_blocking)
+        except OSError:
+            pass
+
+    def _on_readable(self) -> None:
+        try:
+            chunk = os.read(self.fd, 4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            chunk = b""
+        if not chunk:
+            lines = [self._buf.decode("utf-8", errors="replace")] if self._buf else []
+            self._buf.clear()
+            lines.append(":quit")
+            self._push(lines)
+            self.stop()
+            return
+        self._buf += chunk
+        start = 0
+        lines = []
+        while (nl := self._buf.find(b"\n", start)) != -1:
+            lines.append(self._buf[start:nl].decode("utf-8", errors="replace"))
+            start = nl + 1
+        if lines:
+            del self._buf[:start]
+            self._push(lines)
+
+
+def open_stdin_source(loop: asyncio.AbstractEventLoop) -> StdinBridge | StdinReader:
+    """Start an in-loop stdin reader, falling back to the thread bridge where unsupported."""
+    if os.name == "posix":
+        reader = StdinReader(loop, sys.stdin.fileno())
+        try:
+            reader.start()
+            return reader
+        except (NotImplementedError, OSError, ValueError):
+            # e.g. stdin redirected from a regular file, which epoll cannot watch.
+            pass
+    bridge = StdinBridge(loop)
+    bridge.start()
+    return bridge
 
 
 HELP = """Commands (prefix : ; free text goes to orchestrator)\n""" "\n" \
@@ -97,37 +255,63 @@ HELP = """Commands (prefix : ; free text goes to orchestrator)\n""" "\n" \
     "  :send coder Run tests\n"
 
 
+GIT_SHORT_SHA_LEN = 7
+
+
+@functools.lru_cache(maxsize=1)
+def _git_executable() -> str:
+    # An absolute path is one of subprocess's preconditions for posix_spawn.
+    return shutil.which("git") or "git"
+
+
 def _git_cmd(path: str, args: list[str]) -> str:
     """Run a git command within ``path`` and return stripped stdout."""
-    cmd = ["git", "-C", path, *args]
-    return subprocess.run(cmd, capture_output=True, check=True, text=True).stdout.strip()
+    cmd = [_git_executable(), "-C", path, *args]
+    # close_fds=False (and no cwd/preexec_fn) lets subprocess use posix_spawn
+    # instead of fork+exec, so spawn cost does not scale with our RSS.
+    proc = subprocess.run(cmd, capture_output=True, check=True, text=True, close_fds=False)
+    return proc.stdout.strip()
+
+
+def _inside_git_worktree(path: str) -> bool:
+    """Cheaply check for a ``.git`` entry in ``path`` or any parent (or an explicit GIT_DIR)."""
+    if os.environ.get("GIT_DIR"):
+        return True
+    current = os.path.abspath(path)
+    while True:
+        if os.path.exists(os.path.join(current, ".git")):
+            return True
+        parent = os.path.dirname(current)
+        if parent == current:
+            return False
+        current = parent
 
 
 def detect_git_context(path: str) -> Optional[dict[str, Optional[str]]]:
     """Return git repo metadata if ``path`` is inside a repository."""
+    if not _inside_git_worktree(path):
+        return None
+    # One rev-parse yields toplevel, full HEAD sha, and the branch name.
     try:
-        root = _git_cmd(path, ["rev-parse", "--show-toplevel"])
-    except (subprocess.CalledProcessError, FileNotFoundError):
+        out = _git_cmd(path, ["rev-parse", "--show-toplevel", "HEAD", "--abbrev-ref", "HEAD"])
+        root, commit, branch = (out.splitlines() + ["", "", ""])[:3]
+    except subprocess.CalledProcessError:
+        # No commits yet (or HEAD otherwise unresolvable): fall back to the toplevel alone.
+        try:
+            root = _git_cmd(path, ["rev-parse", "--show-toplevel"])
+        except subprocess.CalledProcessError:
+            return None
+        commit = branch = ""
+    except FileNotFoundError:
         return None
 
-    info: dict[str, Optional[str]] = {
+    return {
         "root": root,
         "name": os.path.basename(root) or root,
+        "branch": branch if branch and branch != "HEAD" else None,
+        "commit": commit[:GIT_SHORT_SHA_LEN] or None,
     }
 
-    try:
-        branch = _git_cmd(path, ["rev-parse", "--abbrev-ref", "HEAD"])
-        info["branch"] = branch if branch != "HEAD" else None
-    except subprocess.CalledProcessError:
-        info["branch"] = None
-
-    try:
-        info["commit"] = _git_cmd(path, ["rev-parse", "--short", "HEAD"])
-    except subprocess.CalledProcessError:
-        info["commit"] = None
-
-    return info
-
 
 def print_startup_context() -> None:
     """Print the current working directory and git info if available."""
@@ -154,416 +338,640 @@ def print_startup_context() -> None:
     print(f"Git repo: {git_info['name']} ({details})")
 
 
+def _write_stream(stream, text: str) -> None:
+    """Encode ``text`` once and write it straight to ``stream``'s fd.
+
+    Falls back to the text layer when the stream has no usable fd (e.g. a
+    StringIO substituted in tests). Waits for the fd to drain rather than
+    failing when it has been left non-blocking.
+    """
+    try:
+        fd = stream.fileno()
+    except (AttributeError, OSError, ValueError):
+        stream.write(text)
+        stream.flush()
+        return
+    # Anything print() left in the text buffer must land first.
+    stream.flush()
+    data = text.encode(stream.encoding or "utf-8", stream.errors or "strict")
+    view = memoryview(data)
+    while view:
+        try:
+            written = os.write(fd, view)
+        except BlockingIOError:
+            # The fd can share a non-blocking file description with stdin (see StdinReader.start).
+            select.select([], [fd], [])
+            continue
+        view = view[written:]
+
+
 class Printer:
     """Pretty-printer for hub events."""
 
     PREFIX_LABEL_WIDTH = 18
 
+    __slots__ = (
+        "p",
+        "tail_agent",
+        "show_state_events",
+        "_last_states",
+        "_out",
+        "_err",
+        "_seq_open",
+        "_seq_close",
+        "_label_cache",
+        "_state_lines",
+    )
+
     def __init__(self, palette: Palette) -> None:
         self.p = palette
         self.tail_agent: Optional[str] = None
         self.show_state_events = True
         self._last_states: dict[str, Optional[str]] = {}
-
-    def _format_lines(self, text: str) -> list[str]:
-        if not text:
-            return [""]
-        stripped = text.lstrip()
-        if stripped.startswith("```control"):
-            return self._format_control_block(text)
-        return text.splitlines()
+        self._out: list[str] = []
+        self._err: list[str] = []
+        self._seq_open, self._seq_close = palette.wrap("muted")
+        # (colour_key, label) -> (prefix text after "[seq]", open, close)
+        self._label_cache: dict[tuple[str, str], tuple[str, str, str]] = {}
+        # (agent, state, indicator) -> rendered line minus the "[seq]" head
+        self._state_lines: dict[tuple[str, str, str], str] = {}
 
     @staticmethod
-    def _format_control_block(text: str) -> list[str]:
-        lines = text.splitlines() or [""]
-        formatted = ["control payload:"]
-        formatted.extend(f"    {line}" for line in lines)
-        return formatted
+    def _split_lines(text: str) -> list[str]:
+        """Same result as ``text.splitlines()``, via a plain split when only "\n" can break."""
+        if not text.isascii() or _EXTRA_LINE_BREAKS_RE.search(text):
+            return text.splitlines()
+        if text.endswith("\n"):
+            text = text[:-1]
+        return text.split("\n")
+
+    def _iter_lines(self, text: str) -> Iterator[str]:
+        if not text:
+            yield ""
+            return
+        if text.lstrip().startswith("```control"):
+            yield "control payload:"
+            for line in self._split_lines(text):
+                yield f"    {line}"
+            return
+        yield from self._split_lines(text)
+
+    def _label_parts(self, colour_key: str, label: str) -> tuple[str, str, str]:
+        key = (colour_key, label)
+        parts = self._label_cache.get(key)
+        if parts is None:
+            if len(self._label_cache) >= 512:
+                self._label_cache.clear()
+            open_c, close_c = self.p.wrap(colour_key)
+            text = label.strip()[: self.PREFIX_LABEL_WIDTH]
+            head = f"{self._seq_close} {open_c}{text:<{self.PREFIX_LABEL_WIDTH}}{close_c}"
+            parts = self._label_cache[key] = (head, open_c, close_c)
+        return parts
 
     def line(self, seq: int, label: str, text: str, colour: str, system: bool = False) -> None:
         colour_key = "muted" if system else colour
-        label = label.strip()
-        label = label[: self.PREFIX_LABEL_WIDTH]
-        seq_str = f"{self.p.c('muted')}[{seq:03d}]{self.p.r()}"
-        label_str = f"{self.p.c(colour_key)}{label:<{self.PREFIX_LABEL_WIDTH}}{self.p.r()}"
-        prefix = f"{seq_str} {label_str}"
-        indent = " " * len(prefix)
-
-        for idx, body in enumerate(self._format_lines(text)):
-            prefix_out = prefix if idx == 0 else indent
-            body_str = f"{self.p.c(colour_key)}{body}{self.p.r()}" if body else ""
-            sys.stdout.write(f"{prefix_out} {body_str}\n")
-        sys.stdout.flush()
+        head, open_c, close_c = self._label_parts(colour_key, label)
+        prefix = f"{self._seq_open}[{seq:03d}]{head}"
+
+        out = self._out
+        prefix_out = prefix
+        for idx, body in enumerate(self._iter_lines(text)):
+            if idx == 1:
+                # Continuation indent, only built for multi-line bodies.
+                prefix_out = " " * len(prefix)
+            if body:
+                out.append("".join((prefix_out, " ", open_c, body, close_c, "\n")))
+            else:
+                out.append(prefix_out + " \n")
+
+    def _state_line(self, seq: int, agent: str, state: str, indicator: str) -> None:
+        key = (agent, state, indicator)
+        tail = self._state_lines.get(key)
+        if tail is None:
+            body = f"{agent} {indicator} {state}"
+            if "\n" in body or "\r" in body:
+                self.line(seq, "state", body, "muted", system=True)
+                return
+            if len(self._state_lines) >= 64:
+                self._state_lines.clear()
+            head, open_c, close_c = self._label_parts("muted", "state")
+            tail = f"{head} {open_c}{body}{close_c}\n"
+            self._state_lines[key] = tail
+        self._out.append(f"{self._seq_open}[{seq:03d}]{tail}")
+
+    def flush(self) -> None:
+        """Write all buffered lines with a single write per stream."""
+        if self._out:
+            _write_stream(sys.stdout, "".join(self._out))
+            self._out.clear()
+        if self._err:
+            _write_stream(sys.stderr, "".join(self._err))
+            self._err.clear()
 
     def event(self, ev: dict) -> None:
-        payload = ev.get("payload") or {}
-        seq = ev.get("seq")
-        who = ev.get("who")
-        etype = ev.get("type")
+        self._render(ev)
+        self.flush()
 
+    def render_batch(self, events: list[dict]) -> None:
+        for ev in events:
+            self._render(ev)
+        self.flush()
+
+    def _render(self, ev: dict) -> None:
+        handler = self._EVENT_HANDLERS.get(ev.get("type"))
+        if handler is None:
+            return
+        seq = ev.get("seq")
         if seq is None:
             return
+        handler(self, seq, ev.get("who"), ev.get("payload") or _EMPTY_PAYLOAD)
 
-        if etype == "user_to_orch":
-            self.line(seq, "You→ORCH", payload.get("text", ""), "you")
-        elif etype == "orch_to_user":
-            self.line(seq, "ORCH→You", payload.get("text", ""), "orch")
-        elif etype == "orch_to_agent":
-            agent = payload.get("agent", "?")
-            action = (payload.get("action") or "").upper()
-            headline = f"ORCH→{agent}"[: self.PREFIX_LABEL_WIDTH]
-            text = payload.get("text", "")
-            if action:
-                text = f"[{action}] {text}" if text else f"[{action}]"
-            self.line(seq, headline, text, "agent")
-        elif etype == "agent_to_orch":
-            self.line(seq, f"{who}→ORCH", payload.get("text", ""), "agent")
-        elif etype == "status":
-            msg = payload.get("text") or ""
-            self.line(seq, "status", msg, "work", system=True)
-        elif etype == "task_started":
-            msg = payload.get("text") or "Working"
-            subject = who or "task"
-            self.line(seq, "status", f"{subject}: {msg}", "work", system=True)
-        elif etype == "error":
-            msg = payload.get("message") or "Unknown error"
-            self.line(seq, f"{who} error", msg, "err")
-        elif etype == "agent_state":
-            if not self.show_state_events:
-                return
-            agent = payload.get("agent", "?")
-            state = payload.get("state", "unknown")
-            previous = self._last_states.get(agent)
-            if previous is None:
-                indicator = "•"
-            elif previous == state:
-                indicator = "="
-            else:
-                indicator = "→"
-            self._last_states[agent] = state
-            body = f"{agent} {indicator} {state}"
-            self.line(seq, "state", body, "muted", system=True)
-        elif etype == "agent_added":
-            agent = payload.get("agent", "")
-            self.line(seq, "agents", f"added {agent}", "ok", system=True)
-        elif etype == "agent_removed":
-            agent = payload.get("agent", "")
-            self.line(seq, "agents", f"removed {agent}", "warn", system=True)
-        elif etype == "autopilot_state":
-            enabled = bool(payload.get("enabled"))
-            status = "ENABLED" if enabled else "DISABLED"
-            colour = "ok" if enabled else "warn"
-            self.line(seq, "autopilot", status, colour, system=True)
-        elif etype == "autopilot_suppressed":
-            summary = payload.get("summary", "control")
-            self.line(seq, "autopilot", f"Suppressed {summary}", "warn", system=True)
-        elif etype == "decision":
-            action = payload.get("action", "")
-            reason = payload.get("reason", "")
-            who_decided = payload.get("who", "orchestrator")
-            summary = action or "decision"
-            if reason:
-                summary = f"{summary} - {reason}"
-            self.line(seq, f"{who_decided} decision", summary, "ok", system=True)
-        elif etype == "status_posted":
-            scope = payload.get("scope", "")
-            text_body = payload.get("text", "")
-            detail = f"{scope}: {text_body}" if scope else text_body
-            self.line(seq, "status", detail, "work", system=True)
-        elif etype == "artifact_note":
-            note = payload.get("note", "")
-            self.line(seq, "artifact", note, "muted", system=True)
-        elif etype == "agent_stderr":
-            if self.tail_agent and who == self.tail_agent:
-                sys.stderr.write(payload.get("line", "") + "\n")
-                sys.stderr.flush()
+    def _on_user_to_orch(self, seq: int, who: Optional[str], payload: Mapping[str, Any]) -> None:
+        self.line(seq, "You→ORCH", payload.get("text", ""), "you")
+
+    def _on_orch_to_user(self, seq: int, who: Optional[str], payload: Mapping[str, Any]) -> None:
+        self.line(seq, "ORCH→You", payload.get("text", ""), "orch")
+
+    def _on_orch_to_agent(self, seq: int, who: Optional[str], payload: Mapping[str, Any]) -> None:
+        agent = payload.get("agent", "?")
+        action = (payload.get("action") or "").upper()
+        headline = f"ORCH→{agent}"
+        text = payload.get("text", "")
+        if action:
+            text = f"[{action}] {text}" if text else f"[{action}]"
+        self.line(seq, headline, text, "agent")
+
+    def _on_agent_to_orch(self, seq: int, who: Optional[str], payload: Mapping[str, Any]) -> None:
+        self.line(seq, f"{who}→ORCH", payload.get("text", ""), "agent")
+
+    def _on_status(self, seq: int, who: Optional[str], payload: Mapping[str, Any]) -> None:
+        msg = payload.get("text") or ""
+        self.line(seq, "status", msg, "work", system=True)
+
+    def _on_task_started(self, seq: int, who: Optional[str], payload: Mapping[str, Any]) -> None:
+        msg = payload.get("text") or "Working"
+        subject = who or "task"
+        self.line(seq, "status", f"{subject}: {msg}", "work", system=True)
+
+    def _on_error(self, seq: int, who: Optional[str], payload: Mapping[str, Any]) -> None:
+        msg = payload.get("message") or "Unknown error"
+        self.line(seq, f"{who} error", msg, "err")
+
+    def _on_agent_state(self, seq: int, who: Optional[str], payload: Mapping[str, Any]) -> None:
+        if not self.show_state_events:
+            return
+        agent = payload.get("agent", "?")
+        # Interned so the repeat check below is a pointer comparison.
+        state = sys.intern(str(payload.get("state", "unknown")))
+        previous = self._last_states.get(agent)
+        if previous is None:
+            indicator = "•"
+        elif previous is state:
+            indicator = "="
+        else:
+            indicator = "→"
+        self._last_states[agent] = state
+        self._state_line(seq, agent, state, indicator)
+
+    def _on_agent_added(self, seq: int, who: Optional[str], payload: Mapping[str, Any]) -> None:
+        agent = payload.get("agent", "")
+        self.line(seq, "agents", f"added {agent}", "ok", system=True)
+
+    def _on_agent_removed(self, seq: int, who: Optional[str], payload: Mapping[str, Any]) -> None:
+        agent = payload.get("agent", "")
+        self.line(seq, "agents", f"removed {agent}", "warn", system=True)
+
+    def _on_autopilot_state(self, seq: int, who: Optional[str], payload: Mapping[str, Any]) -> None:
+        enabled = bool(payload.get("enabled"))
+        status = "ENABLED" if enabled else "DISABLED"
+        colour = "ok" if enabled else "warn"
+        self.line(seq, "autopilot", status, colour, system=True)
+
+    def _on_autopilot_suppressed(self, seq: int, who: Optional[str], payload: Mapping[str, Any]) -> None:
+        summary = payload.get("summary", "control")
+        self.line(seq, "autopilot", f"Suppressed {summary}", "warn", system=True)
+
+    def _on_decision(self, seq: int, who: Optional[str], payload: Mapping[str, Any]) -> None:
+        action = payload.get("action", "")
+        reason = payload.get("reason", "")
+        who_decided = payload.get("who", "orchestrator")
+        summary = action or "decision"
+        if reason:
+            summary = f"{summary} - {reason}"
+        self.line(seq, f"{who_decided} decision", summary, "ok", system=True)
+
+    def _on_status_posted(self, seq: int, who: Optional[str], payload: Mapping[str, Any]) -> None:
+        scope = payload.get("scope", "")
+        text_body = payload.get("text", "")
+        detail = f"{scope}: {text_body}" if scope else text_body
+        self.line(seq, "status", detail, "work", system=True)
+
+    def _on_artifact_note(self, seq: int, who: Optional[str], payload: Mapping[str, Any]) -> None:
+        note = payload.get("note", "")
+        self.line(seq, "artifact", note, "muted", system=True)
+
+    def _on_agent_stderr(self, seq: int, who: Optional[str], payload: Mapping[str, Any]) -> None:
+        if self.tail_agent and who == self.tail_agent:
+            err = self._err
+            err.append(payload.get("line", ""))
+            err.append("\n")
+
+    # Event type -> unbound handler; one hash lookup per event in _render.
+    _EVENT_HANDLERS: dict[str, Callable[["Printer", int, Optional[str], Mapping[str, Any]], None]] = {
+        "user_to_orch": _on_user_to_orch,
+        "orch_to_user": _on_orch_to_user,
+        "orch_to_agent": _on_orch_to_agent,
+        "agent_to_orch": _on_agent_to_orch,
+        "status": _on_status,
+        "task_started": _on_task_started,
+        "error": _on_error,
+        "agent_state": _on_agent_state,
+        "agent_added": _on_agent_added,
+        "agent_removed": _on_agent_removed,
+        "autopilot_state": _on_autopilot_state,
+        "autopilot_suppressed": _on_autopilot_suppressed,
+        "decision": _on_decision,
+        "status_posted": _on_status_posted,
+        "artifact_note": _on_artifact_note,
+        "agent_stderr": _on_agent_stderr,
+    }
+
+
+class PlainPrinter(Printer):
+    """Printer for colour-less output; skips the escape-code joins entirely."""
+
+    __slots__ = ()
+
+    def line(self, seq: int, label: str, text: str, colour: str, system: bool = False) -> None:
+        # Colour is irrelevant here, so every label shares one cache entry.
+        prefix = f"[{seq:03d}]{self._label_parts('', label)[0]}"
+        out = self._out
+        prefix_out = prefix
+        for idx, body in enumerate(self._iter_lines(text)):
+            if idx == 1:
+                prefix_out = " " * len(prefix)
+            out.append(f"{prefix_out} {body}\n")
 
 
 def format_agents(hub: Hub) -> str:
-    names = ["app-server", "orchestrator"] + sorted(hub.subs.keys())
-    last_map = getattr(hub, "last_checkin", {}) if hasattr(hub, "last_checkin") else {}
-    parts = []
-    for name in names:
-        state = hub.agent_state.get(name, "unknown")
+    states = hub.agent_state
+    last_map = getattr(hub, "last_checkin", {})
+
+    def entry(name: str) -> str:
         last = last_map.get(name)
-        if isinstance(last, int) and last >= 0:
-            suffix = f", last check-in {last}s"
-        else:
-            suffix = ""
-        parts.append(f"  - {name} [state: {state}{suffix}]")
-    return "Agents:\n" + "\n".join(parts)
+        suffix = f", last check-in {last}s" if isinstance(last, int) and last >= 0 else ""
+        return f"  - {name} [state: {states.get(name, 'unknown')}{suffix}]"
 
+    names = itertools.chain(("app-server", "orchestrator"), sorted(hub.subs))
+    return "Agents:\n" + "\n".join(map(entry, names))
 
 
-async def handle_command(hub: Hub, printer: Printer, raw: str) -> bool:
-    text = raw.strip()
-    if not text:
-        return True
 
-    is_cmd = text[0] in {":", "/", "."}
-    if not is_cmd:
-        await hub.send_to_orchestrator(text)
-        return True
+# Short names accepted wherever a command takes a built-in agent name.
+AGENT_ALIASES: dict[str, str] = {
+    "app": "app-server",
+    "app-server": "app-server",
+    "orch": "orchestrator",
+}
 
-    parts = text[1:].split()
-    if not parts:
-        return True
-    cmd = parts[0].lower()
-    args = parts[1:]
+# Handlers receive the raw text after the command word; each tokenises only as far as it needs.
+CommandHandler = Callable[[Hub, Printer, str], Awaitable[bool]]
 
-    if cmd in {"quit", "exit"}:
-        return False
+GITHUB_UNAVAILABLE = "GitHub helpers unavailable (module import failed)."
 
-    if cmd in {"help", "?"}:
-        print(HELP)
-        return True
 
-    if cmd == "agents":
-        print(format_agents(hub))
-        return True
+async def _cmd_quit(hub: Hub, printer: Printer, rest: str) -> bool:
+    return False
 
-    if cmd == "decide":
-        await hub.decide_now(reason="operator_command")
-        print("Digest sent to orchestrator.")
-        return True
 
-    if cmd == "wip":
-        print(hub.render_wip_table())
-        return True
+async def _cmd_help(hub: Hub, printer: Printer, rest: str) -> bool:
+    print(HELP)
+    return True
 
-    if cmd == "recent":
-        if args and args[0].lower() in {"event", "events"}:
-            count = 50
-            if len(args) > 1 and args[1].isdigit():
-                count = int(args[1])
-            for line in hub.render_recent(count):
-                print(line)
-            return True
-        count = 20
-        if args and args[0].isdigit():
-            count = int(args[0])
-        records = hub.recent_decisions(count)
-        if not records:
-            print("No recorded decisions yet.")
-            return True
-        for rec in records:
-            ts = rec.get("ts")
-            who = rec.get("who", "hub")
-            action = rec.get("action", "")
-            reason = rec.get("reason", "")
-            stamp = f"[{ts}] " if ts is not None else ""
-            line = f"{stamp}{who}: {action}"
-            if reason:
-                line = f"{line} - {reason}"
+
+async def _cmd_agents(hub: Hub, printer: Printer, rest: str) -> bool:
+    print(format_agents(hub))
+    return True
+
+
+async def _cmd_decide(hub: Hub, printer: Printer, rest: str) -> bool:
+    await hub.decide_now(reason="operator_command")
+    print("Digest sent to orchestrator.")
+    return True
+
+
+async def _cmd_wip(hub: Hub, printer: Printer, rest: str) -> bool:
+    print(hub.render_wip_table())
+    return True
+
+
+async def _cmd_recent(hub: Hub, printer: Printer, rest: str) -> bool:
+    args = rest.split()
+    if args and args[0].lower() in {"event", "events"}:
+        count = 50
+        if len(args) > 1 and args[1].isdigit():
+            count = int(args[1])
+        for line in hub.render_recent(count):
             print(line)
         return True
+    count = 20
+    if args and args[0].isdigit():
+        count = int(args[0])
+    records = hub.recent_decisions(count)
+    if not records:
+        print("No recorded decisions yet.")
+        return True
+    for rec in records:
+        ts = rec.get("ts")
+        who = rec.get("who", "hub")
+        action = rec.get("action", "")
+        reason = rec.get("reason", "")
+        stamp = f"[{ts}] " if ts is not None else ""
+        line = f"{stamp}{who}: {action}"
+        if reason:
+            line = f"{line} - {reason}"
+        print(line)
+    return True
+
 
-    if cmd == "plan":
-        print(hub.render_plan())
+async def _cmd_plan(hub: Hub, printer: Printer, rest: str) -> bool:
+    print(hub.render_plan())
+    return True
+
+
+async def _cmd_summary(hub: Hub, printer: Printer, rest: str) -> bool:
+    args = rest.split()
+    if not args:
+        print("Usage: :summary <issue-number>")
+        return True
+    try:
+        issue_number = int(args[0])
+    except ValueError:
+        print("Issue number must be an integer")
         return True
+    print(hub.render_issue_summary(issue_number))
+    return True
 
-    if cmd == "summary":
-        if not args:
-            print("Usage: :summary <issue-number>")
-            return True
-        try:
-            issue_number = int(args[0])
-        except ValueError:
-            print("Issue number must be an integer")
-            return True
-        print(hub.render_issue_summary(issue_number))
+
+async def _cmd_state(hub: Hub, printer: Printer, rest: str) -> bool:
+    print("State:", hub.agent_state)
+    return True
+
+
+async def _cmd_say(hub: Hub, printer: Printer, rest: str) -> bool:
+    if not rest:
+        print("Usage: :say <text>")
         return True
+    await hub.send_to_orchestrator(rest)
+    return True
+
 
-    if cmd == "state":
-        print("State:", hub.agent_state)
+async def _cmd_spawn(hub: Hub, printer: Printer, rest: str) -> bool:
+    args = rest.split(None, 1)
+    if len(args) < 2:
+        print("Usage: :spawn <name> <task...>")
         return True
+    await hub.spawn_sub(args[0], args[1], hub.default_cwd)
+    return True
 
-    if cmd == "say":
-        if not args:
-            print("Usage: :say <text>")
-            return True
-        payload = " ".join(args)
-        await hub.send_to_orchestrator(payload)
+
+async def _cmd_send(hub: Hub, printer: Printer, rest: str) -> bool:
+    args = rest.split(None, 1)
+    if len(args) < 2:
+        print("Usage: :send <name> <task...>")
         return True
+    await hub.send_to_sub(args[0], args[1])
+    return True
 
-    if cmd == "spawn":
-        if len(args) < 2:
-            print("Usage: :spawn <name> <task...>")
-            return True
-        name = args[0]
-        task_text = " ".join(args[1:])
-        await hub.spawn_sub(name, task_text, hub.default_cwd)
+
+async def _cmd_close(hub: Hub, printer: Printer, rest: str) -> bool:
+    args = rest.split()
+    if len(args) != 1:
+        print("Usage: :close <name>")
         return True
+    await hub.close_sub(args[0])
+    return True
 
-    if cmd == "send":
-        if len(args) < 2:
-            print("Usage: :send <name> <task...>")
-            return True
-        name = args[0]
-        task_text = " ".join(args[1:])
-        await hub.send_to_sub(name, task_text)
+
+async def _cmd_stderr(hub: Hub, printer: Printer, rest: str) -> bool:
+    args = rest.split()
+    if not args:
+        print("Usage: :stderr <name> [N]")
         return True
+    alias = args[0]
+    name = AGENT_ALIASES.get(alias, alias)
+    count = int(args[1]) if len(args) > 1 else 100
+    buf = hub._stderr_buf.get(name)
+    if buf:
+        size = len(buf)
+        start = size - count if 0 < count < size else 0
+        lines = list(itertools.islice(buf, start, size))
+    else:
+        lines = []
+    if not lines:
+        print(f"No stderr for '{name}'")
+    else:
+        print(f"--- stderr last {len(lines)} lines for {name} ---")
+        lines.append("")
+        _write_stream(sys.stderr, "\n".join(lines))
+    return True
 
-    if cmd == "close":
-        if len(args) != 1:
-            print("Usage: :close <name>")
-            return True
-        await hub.close_sub(args[0])
+
+async def _cmd_tail(hub: Hub, printer: Printer, rest: str) -> bool:
+    args = rest.split()
+    if not args:
+        print("Usage: :tail <name|off>")
         return True
+    alias = args[0].lower()
+    target = AGENT_ALIASES.get(alias, alias)
+    if target == "off":
+        printer.tail_agent = None
+        print("Tail off")
+        return True
+    if target not in {"orchestrator", "app-server"} and target not in hub.subs:
+        print(f"No such agent '{target}'")
+        return True
+    printer.tail_agent = target
+    print(f"Tailing stderr for {target}. Use :tail off to stop or Ctrl+C.")
+    return True
 
-    if cmd == "stderr":
-        if not args:
-            print("Usage: :stderr <name> [N]")
-            return True
-        alias = args[0]
-        name = {
-            "app": "app-server",
-            "app-server": "app-server",
-            "orch": "orchestrator",
-        }.get(alias, alias)
-        count = int(args[1]) if len(args) > 1 else 100
-        lines = list(hub._stderr_buf.get(name, []))[-count:]
-        if not lines:
-            print(f"No stderr for '{name}'")
-        else:
-            print(f"--- stderr last {len(lines)} lines for {name} ---")
-            for line in lines:
-                sys.stderr.write(line + "\n")
-            sys.stderr.flush()
+
+async def _cmd_autopilot(hub: Hub, printer: Printer, rest: str) -> bool:
+    args = rest.split()
+    if not args or args[0].lower() not in {"on", "off"}:
+        print("Usage: :autopilot on|off")
         return True
+    enabled = args[0].lower() == "on"
+    await hub.set_autopilot(enabled)
+    status = "ENABLED" if enabled else "DISABLED"
+    print(f"Autopilot {status}")
+    return True
 
-    if cmd == "tail":
-        if not args:
-            print("Usage: :tail <name|off>")
-            return True
-        alias = args[0].lower()
-        target = {
-            "app": "app-server",
-            "app-server": "app-server",
-            "orch": "orchestrator",
-        }.get(alias, alias)
-        if target == "off":
-            printer.tail_agent = None
-            print("Tail off")
-            return True
-        if target not in {"orchestrator", "app-server"} and target not in hub.subs:
-            print(f"No such agent '{target}'")
-            return True
-        printer.tail_agent = target
-        print(f"Tailing stderr for {target}. Use :tail off to stop or Ctrl+C.")
+
+async def _cmd_issue_list(hub: Hub, printer: Printer, rest: str) -> bool:
+    if github_sync is None:
+        print(GITHUB_UNAVAILABLE)
         return True
+    repo = hub.default_cwd or os.getcwd()
+    try:
+        issues = await asyncio.to_thread(github_sync.list_orchestrate_issues, repo)
+    except github_sync.GitHubError as exc:
+        print(f"GitHub error: {exc}")
+        return True
+    if not issues:
+        print("No open issues with label 'orchestrate'.")
+        return True
+    print("Open orchestrate issues:")
+    for item in issues:
+        labels = ", ".join(item.labels)
+        suffix = f" [{labels}]" if labels else ""
+        print(f"  - #{item.number} {item.title} ({item.state}){suffix}")
+    return True
 
-    if cmd == "autopilot":
-        if not args or args[0].lower() not in {"on", "off"}:
-            print("Usage: :autopilot on|off")
-            return True
-        enabled = args[0].lower() == "on"
-        await hub.set_autopilot(enabled)
-        status = "ENABLED" if enabled else "DISABLED"
-        print(f"Autopilot {status}")
+
+async def _show_issue(hub: Hub, args: list[str], send: bool) -> bool:
+    if github_sync is None:
+        print(GITHUB_UNAVAILABLE)
+        return True
+    if not args:
+        print("Usage: :issue <number> | :issue-prompt <number>")
         return True
+    try:
+        issue_number = int(args[0])
+    except ValueError:
+        print("Issue number must be an integer")
+        return True
+    repo = hub.default_cwd or os.getcwd()
+    try:
+        issue = await asyncio.to_thread(github_sync.fetch_issue, repo, issue_number)
+    except github_sync.GitHubError as exc:
+        print(f"GitHub error: {exc}")
+        return True
+    charter = github_sync.parse_issue_body(issue.body)
+    prompt = github_sync.format_issue_prompt(issue, charter)
+    print(prompt)
+    if send:
+        await hub.send_to_orchestrator(prompt)
+    return True
 
-    if cmd == "issue-list":
-        if github_sync is None:
-            print("GitHub helpers unavailable (module import failed).")
-            return True
-        repo = hub.default_cwd or os.getcwd()
-        try:
-            issues = github_sync.list_orchestrate_issues(repo)
-        except github_sync.GitHubError as exc:
-            print(f"GitHub error: {exc}")
-            return True
-        if not issues:
-            print("No open issues with label 'orchestrate'.")
-            return True
-        print("Open orchestrate issues:")
-        for item in issues:
-            labels = ", ".join(item.labels)
-            suffix = f" [{labels}]" if labels else ""
-            print(f"  - #{item.number} {item.title} ({item.state}){suffix}")
+
+async def _cmd_issue(hub: Hub, printer: Printer, rest: str) -> bool:
+    return await _show_issue(hub, rest.split(), send=False)
+
+
+async def _cmd_issue_prompt(hub: Hub, printer: Printer, rest: str) -> bool:
+    return await _show_issue(hub, rest.split(), send=True)
+
+
+async def _cmd_gh_issue(hub: Hub, printer: Printer, rest: str) -> bool:
+    if github_sync is None:
+        print(GITHUB_UNAVAILABLE)
+        return True
+    args = rest.split(None, 1)
+    if len(args) < 2:
+        print("Usage: :gh-issue <number> <comment...>")
         return True
+    try:
+        number = int(args[0])
+    except ValueError:
+        print("Issue number must be an integer")
+        return True
+    comment = args[1]
+    repo = hub.default_cwd or os.getcwd()
+    try:
+        await asyncio.to_thread(github_sync.comment_issue, repo, number, comment)
+    except github_sync.GitHubError as exc:
+        print(f"GitHub error: {exc}")
+        return True
+    print(f"Commented on issue #{number}.")
+    return True
 
-    if cmd in {"issue", "issue-prompt", "issueprompt"}:
-        if github_sync is None:
-            print("GitHub helpers unavailable (module import failed).")
-            return True
-        if not args:
-            print("Usage: :issue <number> | :issue-prompt <number>")
-            return True
-        try:
-            issue_number = int(args[0])
-        except ValueError:
-            print("Issue number must be an integer")
-            return True
-        repo = hub.default_cwd or os.getcwd()
-        try:
-            issue = github_sync.fetch_issue(repo, issue_number)
-        except github_sync.GitHubError as exc:
-            print(f"GitHub error: {exc}")
-            return True
-        charter = github_sync.parse_issue_body(issue.body)
-        prompt = github_sync.format_issue_prompt(issue, charter)
-        print(prompt)
-        if cmd != "issue":
-            await hub.send_to_orchestrator(prompt)
+
+async def _cmd_gh_pr(hub: Hub, printer: Printer, rest: str) -> bool:
+    if github_sync is None:
+        print(GITHUB_UNAVAILABLE)
+        return True
+    args = rest.split(None, 1)
+    if len(args) < 2:
+        print("Usage: :gh-pr <number> <comment...>")
+        return True
+    try:
+        number = int(args[0])
+    except ValueError:
+        print("PR number must be an integer")
+        return True
+    comment = args[1]
+    repo = hub.default_cwd or os.getcwd()
+    try:
+        await asyncio.to_thread(github_sync.comment_pr, repo, number, comment)
+    except github_sync.GitHubError as exc:
+        print(f"GitHub error: {exc}")
         return True
+    print(f"Commented on PR #{number}.")
+    return True
 
-    if cmd == "gh-issue":
-        if github_sync is None:
-            print("GitHub helpers unavailable (module import failed).")
-            return True
-        if len(args) < 2:
-            print("Usage: :gh-issue <number> <comment...>")
-            return True
-        try:
-            number = int(args[0])
-        except ValueError:
-            print("Issue number must be an integer")
-            return True
-        comment = " ".join(args[1:])
-        repo = hub.default_cwd or os.getcwd()
-        try:
-            github_sync.comment_issue(repo, number, comment)
-        except github_sync.GitHubError as exc:
-            print(f"GitHub error: {exc}")
-            return True
-        print(f"Commented on issue #{number}.")
+
+async def _cmd_statefeed(hub: Hub, printer: Printer, rest: str) -> bool:
+    args = rest.split()
+    if not args or args[0].lower() not in {"on", "off"}:
+        print("Usage: :statefeed on|off")
         return True
+    enabled = args[0].lower() == "on"
+    printer.show_state_events = enabled
+    status = "enabled" if enabled else "disabled"
+    print(f"State change events {status}.")
+    return True
 
-    if cmd == "gh-pr":
-        if github_sync is None:
-            print("GitHub helpers unavailable (module import failed).")
-            return True
-        if len(args) < 2:
-            print("Usage: :gh-pr <number> <comment...>")
-            return True
-        try:
-            number = int(args[0])
-        except ValueError:
-            print("PR number must be an integer")
-            return True
-        comment = " ".join(args[1:])
-        repo = hub.default_cwd or os.getcwd()
-        try:
-            github_sync.comment_pr(repo, number, comment)
-        except github_sync.GitHubError as exc:
-            print(f"GitHub error: {exc}")
-            return True
-        print(f"Commented on PR #{number}.")
+
+COMMAND_PREFIXES = (":", "/", ".")
+
+COMMANDS: dict[str, CommandHandler] = {
+    "quit": _cmd_quit,
+    "exit": _cmd_quit,
+    "help": _cmd_help,
+    "?": _cmd_help,
+    "agents": _cmd_agents,
+    "decide": _cmd_decide,
+    "wip": _cmd_wip,
+    "recent": _cmd_recent,
+    "plan": _cmd_plan,
+    "summary": _cmd_summary,
+    "state": _cmd_state,
+    "say": _cmd_say,
+    "spawn": _cmd_spawn,
+    "send": _cmd_send,
+    "close": _cmd_close,
+    "stderr": _cmd_stderr,
+    "tail": _cmd_tail,
+    "autopilot": _cmd_autopilot,
+    "issue-list": _cmd_issue_list,
+    "issue": _cmd_issue,
+    "issue-prompt": _cmd_issue_prompt,
+    "issueprompt": _cmd_issue_prompt,
+    "gh-issue": _cmd_gh_issue,
+    "gh-pr": _cmd_gh_pr,
+    "statefeed": _cmd_statefeed,
+}
+
+
+async def handle_command(hub: Hub, printer: Printer, raw: str) -> bool:
+    text = raw.strip()
+    if not text:
         return True
 
-    if cmd == "statefeed":
-        if not args or args[0].lower() not in {"on", "off"}:
-            print("Usage: :statefeed on|off")
-            return True
-        enabled = args[0].lower() == "on"
-        printer.show_state_events = enabled
-        status = "enabled" if enabled else "disabled"
-        print(f"State change events {status}.")
+    if not text.startswith(COMMAND_PREFIXES):
+        await hub.send_to_orchestrator(text)
         return True
 
-    print(f"Unknown command: {cmd}. Try :help")
-    return True
+    parts = text[1:].split(None, 1)
+    if not parts:
+        return True
+    cmd = parts[0].lower()
+    handler = COMMANDS.get(cmd)
+    if handler is None:
+        print(f"Unknown command: {cmd}. Try :help")
+        return True
+    return await handler(hub, printer, parts[1] if len(parts) > 1 else "")
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -579,9 +987,60 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--checkin", default="10m", help="Default check-in interval (e.g., 10m, 30m, 1h)")
     parser.add_argument("--budget", default="45m", help="Default time budget per task (e.g., 45m, 90m)")
     parser.add_argument("--otel-log", default=os.environ.get("ORCH_OTEL_LOG"), help="Path to OTEL JSONL log to tail")
+    parser.add_argument(
+        "--event-loop",
+        choices=["auto", "uvloop", "default"],
+        default=os.environ.get("ORCH_EVENT_LOOP") or "auto",
+        help="Event loop implementation (auto uses uvloop when installed)",
+    )
     return parser
 
 
+def coalesce_agent_states(batch: list[dict]) -> list[dict]:
+    """Drop ``agent_state`` events that repeat the agent's previous state within ``batch``.
+
+    Only repeats are removed, so a transition such as idle -> working -> idle still
+    renders every step with its indicator.
+    """
+    last: dict[str, Any] = {}
+    skip: set[int] = set()
+    for idx, ev in enumerate(batch):
+        if ev.get("type") != "agent_state":
+            continue
+        payload = ev.get("payload") or _EMPTY_PAYLOAD
+        agent = payload.get("agent", "?")
+        state = payload.get("state", "unknown")
+        if agent in last and last[agent] == state:
+            skip.add(idx)
+        last[agent] = state
+    if not skip:
+        return batch
+    return [ev for idx, ev in enumerate(batch) if idx not in skip]
+
+
+SCRIPT_READ_CHUNK = 1 << 16
+
+
+async def iter_script_lines(path: str) -> AsyncIterator[str]:
+    """Yield a command script's lines, reading it in chunks off the event loop."""
+    # Text mode keeps universal-newline handling, including CRLF split across chunks.
+    handle = await asyncio.to_thread(open, path, "r", encoding="utf-8", errors="replace")
+    try:
+        carry = ""
+        while True:
+            chunk = await asyncio.to_thread(handle.read, SCRIPT_READ_CHUNK)
+            if not chunk:
+                break
+            lines = (carry + chunk).split("\n")
+            carry = lines.pop()
+            for line in lines:
+                yield line
+        if carry:
+            yield carry
+    finally:
+        handle.close()
+
+
 async def run_cli(args: argparse.Namespace) -> None:
     loop = asyncio.get_running_loop()
     stop_event = asyncio.Event()
@@ -589,7 +1048,7 @@ async def run_cli(args: argparse.Namespace) -> None:
 
     colours_enabled = sys.stdout.isatty() and (not args.no_colour)
     palette = Palette(enabled=colours_enabled)
-    printer = Printer(palette)
+    printer = Printer(palette) if colours_enabled else PlainPrinter(palette)
 
     print_startup_context()
 
@@ -606,43 +1065,49 @@ async def run_cli(args: argparse.Namespace) -> None:
     await hub.start(seed_text=args.seed)
     queue = hub.subscribe()
 
-    stdin_bridge: Optional[StdinBridge] = None
-    script_lines: list[str] = []
+    stdin_bridge: Optional[StdinBridge | StdinReader] = None
     if args.script:
         if not os.path.exists(args.script):
             print(f"Script file not found: {args.script}")
             await hub.stop()
             return
-        with open(args.script, "r", encoding="utf-8") as handle:
-            script_lines = [line.rstrip("\n") for line in handle]
-        script_lines.append(":quit")
     else:
-        stdin_bridge = StdinBridge(loop)
-        stdin_bridge.start()
+        stdin_bridge = open_stdin_source(loop)
 
     async def pump_events() -> None:
         while True:
-            ev = await queue.get()
-            printer.event(ev)
+            batch = [await queue.get()]
+            while len(batch) < EVENT_BATCH_MAX:
+                try:
+                    batch.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            printer.render_batch(coalesce_agent_states(batch))
 
     async def pump_input() -> None:
         try:
-            if script_lines:
-                for line in script_lines:
-                    cont = await handle_command(hub, printer, line)
-                    if not cont:
-                        stop_event.set()
-                        return
+            if args.script:
+                try:
+                    async with contextlib.aclosing(iter_script_lines(args.script)) as lines:
+                        async for line in lines:
+                            if not await handle_command(hub, printer, line):
+                                break
+                except OSError as exc:
+                    print(f"Script file could not be read: {exc}")
+                # End of script behaves like a trailing ":quit".
                 return
             assert stdin_bridge is not None
             while not stop_event.is_set():
-                line = await stdin_bridge.queue.get()
-                cont = await handle_command(hub, printer, line)
-                if not cont:
-                    stop_event.set()
-                    return
+                for line in await stdin_bridge.next_lines():
+                    cont = await handle_command(hub, printer, line)
+                    if not cont:
+                        return
         except asyncio.CancelledError:
             return
+        finally:
+            # However input ends (quit, end of script, or an error), shut the hub down
+            # rather than leave run_cli waiting forever.
+            stop_event.set()
 
     tasks = [
         asyncio.create_task(pump_events(), name="events"),
@@ -661,6 +1126,7 @@ async def run_cli(args: argparse.Namespace) -> None:
 def main() -> None:
     parser = build_parser()
     args = parser.parse_args()
+    configure_event_loop(args.event_loop)
     try:
         asyncio.run(run_cli(args))
     except KeyboardInterrupt:
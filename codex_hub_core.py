@@ -3,15 +3,19 @@
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
+import functools
 import json
 import os
 import re
 import signal
+import sys
+import threading
 import time
 import uuid
-from collections import defaultdict, deque
+from collections import deque
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, List, Optional, Set, Tuple
 
 from app_server_client import AppServerProcess
 from local_exec import run_exec
@@ -24,6 +28,11 @@ try:
 except Exception:  # pragma: no cover - optional dependency
     ghx = None
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
 ORCHESTRATOR_SYSTEM = (
     "You are the ORCHESTRATOR agent.\n"
     "Plan work, spin up named sub-agents (new conversations), and iterate until goals are met.\n"
@@ -54,11 +63,50 @@ SUBAGENT_SYSTEM_TEMPLATE = (
 )
 
 FALLBACK_SYSTEM_PREFIX = "### SYSTEM MESSAGE (treat as system role) ###\n"
+ORCHESTRATOR_INITIAL_TEXT = f"{FALLBACK_SYSTEM_PREFIX}{ORCHESTRATOR_SYSTEM}"
+# Lines of stderr retained per process for :stderr.
+STDERR_TAIL_LINES = 500
+# Size at which .orch/state.jsonl is rolled over to state.jsonl.1.
+STATE_JOURNAL_MAX_BYTES = 2_000_000
+# Journal events queued for the writer task, and how many it writes per call.
+STATE_QUEUE_MAX = 4096
+STATE_WRITE_BATCH = 128
+# Sub-agent messages arriving within this window share one stored artifact.
+AGENT_MESSAGE_COALESCE_S = 0.25
+# App-server events handled back to back before the pump yields to other tasks.
+APP_EVENT_SLICE = 64
+# Broadcast events kept for subscribers; one that falls further behind skips ahead.
+EVENT_RING_SIZE = 4096
+# Command arguments quoted in approval status lines.
+APPROVAL_COMMAND_ARGS = 4
+# Minimum gap between status-comment pushes per agent, and GitHub writes in flight at once.
+STATUS_PUSH_INTERVAL_S = 180.0
+GITHUB_WRITE_CONCURRENCY = 4
+
+DIGEST_HEADER = "Decision-ready digest:"
+EVENT_BLOCK_OPEN = "\n\n```event\n"
+EVENT_BLOCK_CLOSE = "\n```"
+NUDGE_TEXT = (
+    "Quick check-in:\n"
+    "- What is the next small step?\n"
+    "- Is anything blocking you?\n"
+    "- ETA to a minimal PR or result?"
+)
+WRAP_UP_TEXT = (
+    "Time budget reached. Please summarise status, remaining work, and immediate next actions. "
+    "If you have a branch or partial PR, share links now."
+)
+
 CONTROL_BLOCK_RE = re.compile(
     r"```(?:json\s+)?control\s*\n(.*?)\n```", re.DOTALL | re.IGNORECASE
 )
+CONTROL_FENCE = "```"
+_MULTI_NL_RE = re.compile(r"\n{2,}")
+_AGENT_NAME_RE = re.compile(r"[^a-z0-9]+")
+# Quoted keys that mark a bare (unfenced) JSON line as a control payload.
+_BARE_CONTROL_KEYS = ('"spawn"', '"send"', '"close"')
 
-TEXT_ITEM_TYPES = {"text", "assistant_delta", "assistant_message"}
+TEXT_ITEM_TYPES = frozenset({"text", "assistant_delta", "assistant_message"})
 ASSISTANT_METHODS = {
     "assistant_message",
     "agent_message",
@@ -67,44 +115,141 @@ ASSISTANT_METHODS = {
 }
 TASK_STARTED_METHODS = {"task_started", "status", "progress_started"}
 TASK_COMPLETE_METHODS = {"task_complete", "progress_complete"}
+# codex/event message types that are deliberately not surfaced.
+CODEX_QUIET_EVENT_TYPES = frozenset(
+    {"token_count", "agent_reasoning", "agent_reasoning_delta", "agent_reasoning_section_break"}
+)
+# Notification methods carrying those events, dropped by the pump before any other work.
+CODEX_QUIET_METHODS = frozenset(f"codex/event/{msg_type}" for msg_type in CODEX_QUIET_EVENT_TYPES)
 
 
-def strip_control_blocks(text: str) -> str:
-    if not text:
-        return ""
-    cleaned = CONTROL_BLOCK_RE.sub("", text)
-    cleaned = re.sub(r"\n{2,}", "\n", cleaned)
-    return cleaned.strip()
+if orjson is not None:
+
+    def jdump(obj: Dict[str, Any]) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def _jsonl_line(obj: Dict[str, Any]) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+
+    def _signature(obj: Any) -> bytes:
+        """Canonical (key-sorted) encoding used to de-duplicate control blocks."""
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+
+else:
 
+    def jdump(obj: Dict[str, Any]) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
 
-def jdump(obj: Dict[str, Any]) -> str:
-    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    def _jsonl_line(obj: Dict[str, Any]) -> bytes:
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+    def _signature(obj: Any) -> str:
+        """Canonical (key-sorted) encoding used to de-duplicate control blocks."""
+        return json.dumps(obj, sort_keys=True)
+
+
+def _store_artifacts(root: str, batch: List[Tuple[str, str, str]]) -> List[Optional[str]]:
+    """Write a batch of (agent, kind, text) artifacts; runs on the hub's artifact thread."""
+    try:
+        return artifacts.store_texts(root, [(kind, text, {"agent": name}) for name, kind, text in batch])
+    except Exception:
+        return [None] * len(batch)
+
+
+def _prepare_ready_issues(issues: List[Any], active: Set[int], capacity: Optional[int]) -> List[Tuple[Any, str]]:
+    """Pick unblocked, unassigned issues (at most ``capacity``) and build their prompts.
+
+    Runs in a worker thread from Hub._poll_github.
+    """
+    closed = {item.number for item in issues if (item.state or "").lower() == "closed"}
+    ready: List[Tuple[Any, str]] = []
+    for issue in issues:
+        if capacity is not None and len(ready) >= capacity:
+            break
+        if issue.number in active or issue.number in closed:
+            continue
+        blockers = ghx.parse_blockers(issue.body, issue.labels)
+        if any(b not in closed for b in blockers):
+            continue
+        try:
+            charter = ghx.parse_issue_body(issue.body)
+            prompt = ghx.format_issue_prompt(issue, charter)
+        except Exception:
+            prompt = f"Work on Issue #{issue.number}: {issue.title}"
+        prompt += (
+            "\n\nYou have high permissions and autopilot is enabled. "
+            "Create a small, testable branch or PR. Provide regular check-ins. "
+            "When done, map outcomes to Acceptance and reference this issue."
+        )
+        ready.append((issue, prompt))
+    return ready
 
 
 def new_id(prefix: str = "req:") -> str:
     return f"{prefix}{uuid.uuid4()}"
 
 
+def parse_orchestrator_text(text: str | None) -> Tuple[str, List[Dict[str, Any]]]:
+    """Split orchestrator output into display text and control payloads in one pass.
+
+    Results are memoised per text, so the payload dicts may be shared between
+    calls and must be treated as read-only.
+    """
+    if not text:
+        return "", []
+    display, blocks = _parse_orchestrator_text(text)
+    return display, list(blocks)
+
+
+def strip_control_blocks(text: str) -> str:
+    if not text:
+        return ""
+    return _parse_orchestrator_text(text)[0]
+
+
 def extract_control_blocks(text: str | None) -> List[Dict[str, Any]]:
+    """Return control payloads found in ``text`` (see ``parse_orchestrator_text``)."""
     if not text:
         return []
+    return list(_parse_orchestrator_text(text)[1])
 
-    blocks: List[Dict[str, Any]] = []
 
-    for match in CONTROL_BLOCK_RE.finditer(text):
-        candidate = match.group(1).strip()
-        try:
-            payload = json.loads(candidate)
-        except json.JSONDecodeError:
-            continue
-        if isinstance(payload, dict):
-            blocks.append(payload)
-
-    seen = {json.dumps(block, sort_keys=True) for block in blocks}
+@functools.lru_cache(maxsize=512)
+def _parse_orchestrator_text(text: str) -> Tuple[str, Tuple[Dict[str, Any], ...]]:
+    blocks: List[Dict[str, Any]] = []
+    display = text
+
+    # A plain substring scan is far cheaper than entering the regex engine.
+    if CONTROL_FENCE in text:
+        kept: List[str] = []
+        prev_end = 0
+        for match in CONTROL_BLOCK_RE.finditer(text):
+            kept.append(text[prev_end : match.start()])
+            prev_end = match.end()
+            candidate = match.group(1).strip()
+            try:
+                payload = json.loads(candidate)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(payload, dict):
+                blocks.append(payload)
+        if kept:
+            kept.append(text[prev_end:])
+            display = "".join(kept)
+    display = _MULTI_NL_RE.sub("\n", display).strip()
+
+    # Bare-line payloads must name one of these keys; skip the line walk when none can.
+    if not any(key in text for key in _BARE_CONTROL_KEYS):
+        return display, tuple(blocks)
+
+    # Signatures of blocks kept so far; only built once a bare candidate parses.
+    seen: Optional[Set[Any]] = None
     for line in text.splitlines():
         candidate = line.strip()
         if not (candidate.startswith("{") and candidate.endswith("}")):
             continue
+        if not any(key in candidate for key in _BARE_CONTROL_KEYS):
+            continue
         try:
             payload = json.loads(candidate)
         except json.JSONDecodeError:
@@ -113,17 +258,41 @@ def extract_control_blocks(text: str | None) -> List[Dict[str, Any]]:
             continue
         if not any(k in payload for k in ("spawn", "send", "close")):
             continue
-        signature = json.dumps(payload, sort_keys=True)
+        if seen is None:
+            seen = {_signature(block) for block in blocks}
+        signature = _signature(payload)
         if signature in seen:
             continue
         seen.add(signature)
         blocks.append(payload)
 
-    return blocks
+    return display, tuple(blocks)
+
+
+@functools.lru_cache(maxsize=64)
+def subagent_initial_text(name: str) -> str:
+    """System preamble sent as the first item to a newly spawned sub-agent."""
+    return f"{FALLBACK_SYSTEM_PREFIX}{SUBAGENT_SYSTEM_TEMPLATE.format(name=name)}"
+
+
+@functools.lru_cache(maxsize=512)
+def agent_update_json(name: str, state: str, issue: Optional[int], artifact_id: Optional[str]) -> str:
+    """Serialised AGENT_UPDATE digest event; unchanged agents reuse the cached encoding."""
+    event: Dict[str, Any] = {"type": "AGENT_UPDATE", "agent": name, "state": state}
+    if issue:
+        event["issue"] = issue
+    if artifact_id:
+        event["artifacts"] = {"last_message": artifact_id}
+    return jdump(event)
 
 
 def normalise_agent_name(name: Optional[str]) -> str:
-    token = re.sub(r"[^a-z0-9]+", "_", (name or "").lower()).strip("_")
+    return _normalise_agent_name(name or "")
+
+
+@functools.lru_cache(maxsize=256)
+def _normalise_agent_name(name: str) -> str:
+    token = _AGENT_NAME_RE.sub("_", name.lower()).strip("_")
     return token or "agent"
 
 
@@ -150,6 +319,57 @@ class AgentMeta:
     status_comment_id: Optional[int] = None
     workspace: Optional[str] = None
     closing_after_budget: bool = False
+    last_status_push_at: float = 0.0
+
+
+@dataclass(slots=True)
+class AgentRow:
+    """One sub-agent's records, reachable from its conversation id in a single lookup."""
+
+    name: str
+    agent: Agent
+    meta: AgentMeta
+
+
+class EventSubscription:
+    """A subscriber's read cursor over the hub's shared event ring.
+
+    Provides the ``get``/``get_nowait``/``qsize`` calls consumers used on the
+    per-subscriber ``asyncio.Queue`` this replaces.
+    """
+
+    __slots__ = ("_hub", "_cursor")
+
+    def __init__(self, hub: "Hub") -> None:
+        self._hub = hub
+        self._cursor = hub._sequence
+
+    def qsize(self) -> int:
+        hub = self._hub
+        first = hub._sequence - len(hub._event_ring) + 1
+        return hub._sequence - max(self._cursor + 1, first) + 1
+
+    def empty(self) -> bool:
+        return self._cursor >= self._hub._sequence
+
+    def get_nowait(self) -> Dict[str, Any]:
+        hub = self._hub
+        if self._cursor >= hub._sequence:
+            raise asyncio.QueueEmpty
+        ring = hub._event_ring
+        first = hub._sequence - len(ring) + 1
+        # Events older than the ring are gone; resume from the oldest kept.
+        index = max(0, self._cursor + 1 - first)
+        event = ring[index]
+        self._cursor = first + index
+        return event
+
+    async def get(self) -> Dict[str, Any]:
+        while True:
+            try:
+                return self.get_nowait()
+            except asyncio.QueueEmpty:
+                await self._hub._new_event.wait()
 
 
 class Hub:
@@ -183,42 +403,104 @@ class Hub:
         )
         self.orchestrator: Optional[Agent] = None
         self.subs: Dict[str, Agent] = {}
-        self._conv_to_name: Dict[str, str] = {}
+        # conversation_id -> row; the hot event paths resolve everything from here.
+        self._by_conv: Dict[str, AgentRow] = {}
 
         self.tasks: List[asyncio.Task] = []
         self._stopping = False
-        self._subscribers: Set[asyncio.Queue] = set()
+        # Shared by every subscriber; _sequence is the seq of its newest event.
+        self._event_ring: deque[Dict[str, Any]] = deque(maxlen=EVENT_RING_SIZE)
+        self._new_event = asyncio.Event()
         self._sequence = 0
+        # Agent timestamps (started_at, last_event_at, last_checkin_ts, _orch_last_sent) are
+        # time.monotonic() readings. _now is sampled once per app-server event and shared by
+        # the handlers downstream of the pump.
+        self._now = time.monotonic()
         self.agent_state: Dict[str, str] = {}
-        self._stderr_buf: Dict[str, deque[str]] = defaultdict(lambda: deque(maxlen=500))
-        self._stderr_buf["app-server"]  # ensure key exists
-        self._stderr_buf["orchestrator"]
+        self._stderr_buf: Dict[str, deque[str]] = {
+            "app-server": deque(maxlen=STDERR_TAIL_LINES),
+            "orchestrator": deque(maxlen=STDERR_TAIL_LINES),
+        }
         self.autopilot_enabled: bool = True
         self._autopilot_warned: bool = False
         self.decide_debounce_s = 3.0
         self._orch_dirty: Set[str] = set()
+        # Bumped whenever _orch_dirty changes; keys the sorted view in _dirty_names().
+        self._orch_dirty_version = 0
+        self._dirty_sorted_cache: Tuple[int, List[str]] = (0, [])
         self._orch_extra_blocks: List[Dict[str, Any]] = []
         self._orch_last_sent = 0.0
         self._decision_log: deque[Dict[str, Any]] = deque(maxlen=100)
         self.last_checkin: Dict[str, int] = {}
         self._digest_timer: Optional[asyncio.Task] = None
+        # The loop the hub runs on, captured by start().
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Lower-case notification method -> handler; "codex/event/*" is routed separately.
+        self._notify_handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[None]]] = {
+            "session_configured": self._on_session_configured,
+            "sessionconfigured": self._on_session_configured,
+            "error": self._on_error_notification,
+        }
+        for methods, handler in (
+            (ASSISTANT_METHODS, self._handle_assistant_message),
+            (TASK_STARTED_METHODS, self._on_task_started),
+            (TASK_COMPLETE_METHODS, self._on_task_complete),
+        ):
+            self._notify_handlers.update(dict.fromkeys(methods, handler))
+        # codex/event msg.type -> handler(msg_type, msg, conversation_id)
+        self._codex_handlers: Dict[str, Callable[[str, Dict[str, Any], str], Awaitable[None]]] = {
+            "agent_message": self._on_codex_agent_message,
+            "task_started": self._on_codex_task_started,
+            "task_complete": self._on_codex_task_complete,
+            "exec_command_begin": self._on_codex_exec,
+            "exec_command_end": self._on_codex_exec,
+            "exec_command_output_delta": self._on_codex_exec,
+        }
+        # Sub-agent messages waiting to be stored as one artifact per burst.
+        self._pending_messages: Dict[str, List[str]] = {}
+        self._message_flush: Dict[str, asyncio.TimerHandle] = {}
+        # (agent, kind, text) artifacts written together by one call_soon drain per loop tick.
+        self._pending_artifacts: List[Tuple[str, str, str]] = []
+        self._artifact_drain: Optional[asyncio.Handle] = None
+        # One worker keeps writes in submission order; _artifact_write is the newest batch.
+        self._artifact_exec = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="orch-art")
+        self._artifact_write: Optional[asyncio.Future] = None
         self._watchdog_task: Optional[asyncio.Task] = None
-        self._event_log: deque[str] = deque(maxlen=500)
+        # (seq, who, type) per broadcast; render_recent() formats on demand.
+        self._event_log: deque[Tuple[int, Any, Any]] = deque(maxlen=500)
         self.agent_meta: Dict[str, AgentMeta] = {}
         self.issue_to_agent: Dict[int, str] = {}
+        # Inverse of issue_to_agent, so closing an agent needs no scan.
+        self.agent_to_issues: Dict[str, Set[int]] = {}
         self._status_cache: Dict[int, int] = {}
+        # (issue_number, agent, body) status-comment updates for _github_writer_loop.
+        self._gh_write_q: asyncio.Queue[Tuple[int, str, str]] = asyncio.Queue()
         state_dir = os.path.join(self.repo_path, ".orch")
         os.makedirs(state_dir, exist_ok=True)
         self._state_file = os.path.join(state_dir, "state.jsonl")
+        try:
+            self._state_bytes = os.path.getsize(self._state_file)
+        except OSError:
+            self._state_bytes = 0
+        self._state_fh: Optional[BinaryIO] = None
+        # Guards the journal handle; the writer task writes from a worker thread.
+        self._state_lock = threading.Lock()
+        # Events for the journal writer task; None asks it to finish.
+        self._write_q: asyncio.Queue[Optional[Dict[str, Any]]] = asyncio.Queue(maxsize=STATE_QUEUE_MAX)
+        self._writer_task: Optional[asyncio.Task] = None
+        # Events left out of the journal because the writer queue was full.
+        self.journal_dropped = 0
 
     async def start(self, seed_text: str) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._writer_task = self._loop.create_task(self._writer_loop())
         await self.app.start()
         await self.app.initialize(name="orch", version="0.2.0", user_agent_suffix="orch/0.2.0")
         self.agent_state["app-server"] = "running"
-        await self._broadcast(
+        self._broadcast(
             {"who": "app-server", "type": "agent_added", "payload": {"agent": "app-server"}}
         )
-        await self._broadcast(
+        self._broadcast(
             {
                 "who": "app-server",
                 "type": "agent_state",
@@ -226,7 +508,7 @@ class Hub:
             }
         )
         initial = [
-            {"type": "text", "text": f"{FALLBACK_SYSTEM_PREFIX}{ORCHESTRATOR_SYSTEM}"},
+            {"type": "text", "text": ORCHESTRATOR_INITIAL_TEXT},
             {
                 "type": "text",
                 "text": (
@@ -248,18 +530,20 @@ class Hub:
         watchdog = asyncio.create_task(self._watchdog_loop(), name="hub-watchdog")
         self.tasks.append(watchdog)
         self._watchdog_task = watchdog
+        if ghx is not None:
+            self.tasks.append(asyncio.create_task(self._github_writer_loop(), name="hub-github-writer"))
         if self.github_poll and ghx is not None:
             self.tasks.append(asyncio.create_task(self._poll_github(), name="hub-github"))
         if self.otel_log_path:
             self.tasks.append(asyncio.create_task(self._pump_otel(self.otel_log_path), name="hub-otel"))
 
-        await self._broadcast(
+        self._broadcast(
             {"who": "orchestrator", "type": "agent_added", "payload": {"agent": "orchestrator"}}
         )
-        await self._broadcast(
+        self._broadcast(
             {"who": "orchestrator", "type": "agent_state", "payload": {"agent": "orchestrator", "state": "idle"}}
         )
-        await self._broadcast(
+        self._broadcast(
             {"who": "hub", "type": "autopilot_state", "payload": {"enabled": self.autopilot_enabled}}
         )
         self.last_checkin["app-server"] = -1
@@ -273,22 +557,33 @@ class Hub:
             task.cancel()
         if self._digest_timer:
             self._digest_timer.cancel()
+        for name in list(self._pending_messages):
+            self._flush_agent_messages(name)
+        await self._settle_artifacts()
+        self._artifact_exec.shutdown(wait=False)
         await self.app.stop()
+        if self._writer_task is not None:
+            await self._write_q.put(None)
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+            self._writer_task = None
+        self._close_state()
+        artifacts.close()
 
-    def subscribe(self) -> asyncio.Queue:
-        queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
-        self._subscribers.add(queue)
-        return queue
+    def subscribe(self) -> EventSubscription:
+        return EventSubscription(self)
 
-    def unsubscribe(self, queue: asyncio.Queue) -> None:
-        self._subscribers.discard(queue)
+    def unsubscribe(self, subscription: EventSubscription) -> None:
+        """Kept for callers; a subscription holds no hub resources once dropped."""
 
     async def set_autopilot(self, enabled: bool) -> None:
         if self.autopilot_enabled == enabled:
             return
         self.autopilot_enabled = enabled
         self._autopilot_warned = False
-        await self._broadcast({"who": "hub", "type": "autopilot_state", "payload": {"enabled": enabled}})
+        self._broadcast({"who": "hub", "type": "autopilot_state", "payload": {"enabled": enabled}})
         state_text = "enabled" if enabled else "disabled"
         try:
             await self._send_orch(f"HUB: autopilot {state_text} by human controller.")
@@ -296,11 +591,23 @@ class Hub:
             pass
 
     async def _pump_app_events(self) -> None:
+        stderr_append = self._stderr_buf["app-server"].append
+        handled = 0
         try:
             async for event in self.app.events():
+                self._now = time.monotonic()
+                handled += 1
+                if handled % APP_EVENT_SLICE == 0:
+                    # A buffered burst never suspends on its own; give the
+                    # watchdog, scheduler and pollers a turn.
+                    await asyncio.sleep(0)
                 kind = event.get("kind")
                 if kind == "notification":
-                    method = (event.get("method") or "").lower()
+                    method = event.get("method") or ""
+                    if method in CODEX_QUIET_METHODS:
+                        continue
+                    if not method.islower():
+                        method = method.lower()
                     params = event.get("params") or {}
                     await self._handle_notification(method, params)
                 elif kind == "request":
@@ -310,16 +617,16 @@ class Hub:
                     await self._handle_request(method, params, request_id)
                 elif kind == "stderr":
                     line = event.get("line", "")
-                    self._stderr_buf["app-server"].append(line)
-                    await self._broadcast({"who": "app-server", "type": "agent_stderr", "payload": {"line": line}})
+                    stderr_append(line)
+                    self._broadcast({"who": "app-server", "type": "agent_stderr", "payload": {"line": line}})
                 elif kind == "error":
-                    await self._broadcast({"who": "app-server", "type": "error", "payload": event.get("payload", {})})
+                    self._broadcast({"who": "app-server", "type": "error", "payload": event.get("payload", {})})
                 else:
                     continue
         except asyncio.CancelledError:
             return
         except Exception as exc:
-            await self._broadcast(
+            self._broadcast(
                 {"who": "app-server", "type": "error", "payload": {"message": f"event pump failed: {exc}"}}
             )
 
@@ -327,56 +634,51 @@ class Hub:
         tailer = OTELJsonlTailer(path)
         try:
             async for conv_id, _kind in tailer.events():
-                name = self._conv_to_name.get(conv_id)
-                if name:
-                    meta = self.agent_meta.get(name)
-                    if meta:
-                        meta.last_event_at = time.time()
+                row = self._by_conv.get(conv_id)
+                if row:
+                    row.meta.last_event_at = time.monotonic()
         except asyncio.CancelledError:
             pass
         finally:
             tailer.stop()
 
     async def _handle_notification(self, method: str, params: Dict[str, Any]) -> None:
-        low = method.lower()
-        if low in {"session_configured", "sessionconfigured"}:
-            await self._broadcast({"who": "app-server", "type": "info", "payload": {"message": "session configured", "raw": params}})
-            return
-
-        if low.startswith("codex/event/"):
-            await self._handle_codex_event(low, params)
+        """Dispatch a notification; ``method`` must already be lower-case."""
+        handler = self._notify_handlers.get(method)
+        if handler is not None:
+            await handler(params)
             return
 
-        if low in ASSISTANT_METHODS:
-            await self._handle_assistant_message(params)
+        if method.startswith("codex/event/"):
+            await self._handle_codex_event(method, params)
             return
 
-        if low in TASK_STARTED_METHODS:
-            target = self._name_for_params(params) or "agent"
-            message = params.get("message") or params.get("status") or "Working"
-            await self._broadcast({"who": target, "type": "task_started", "payload": {"text": message}})
-            await self._set_state(target, "working")
-            meta = self.agent_meta.get(target)
-            if meta:
-                meta.last_event_at = time.time()
-            return
+        self._broadcast({"who": "app-server", "type": "misc", "payload": {"method": method, "params": params}})
 
-        if low in TASK_COMPLETE_METHODS:
-            target = self._name_for_params(params) or "agent"
-            await self._set_state(target, "idle")
-            final = params.get("message") or params.get("last_agent_message") or ""
-            if target != "orchestrator" and final:
-                await self._handle_sub_complete(target, final)
-            meta = self.agent_meta.get(target)
-            if meta:
-                meta.last_event_at = time.time()
-            return
+    async def _on_session_configured(self, params: Dict[str, Any]) -> None:
+        self._broadcast({"who": "app-server", "type": "info", "payload": {"message": "session configured", "raw": params}})
 
-        if low == "error":
-            await self._broadcast({"who": self._name_for_params(params) or "app-server", "type": "error", "payload": params})
-            return
+    async def _on_task_started(self, params: Dict[str, Any]) -> None:
+        target = self._name_for_params(params) or "agent"
+        message = params.get("message") or params.get("status") or "Working"
+        self._broadcast({"who": target, "type": "task_started", "payload": {"text": message}})
+        await self._set_state(target, "working")
+        meta = self.agent_meta.get(target)
+        if meta:
+            meta.last_event_at = self._now
+
+    async def _on_task_complete(self, params: Dict[str, Any]) -> None:
+        target = self._name_for_params(params) or "agent"
+        await self._set_state(target, "idle")
+        final = params.get("message") or params.get("last_agent_message") or ""
+        if target != "orchestrator" and final:
+            await self._handle_sub_complete(target, final)
+        meta = self.agent_meta.get(target)
+        if meta:
+            meta.last_event_at = self._now
 
-        await self._broadcast({"who": "app-server", "type": "misc", "payload": {"method": method, "params": params}})
+    async def _on_error_notification(self, params: Dict[str, Any]) -> None:
+        self._broadcast({"who": self._name_for_params(params) or "app-server", "type": "error", "payload": params})
 
     async def _handle_request(self, method: str, params: Dict[str, Any], request_id: Any) -> None:
         if request_id is None:
@@ -389,7 +691,13 @@ class Hub:
 
     async def _handle_codex_event(self, method: str, params: Dict[str, Any]) -> None:
         msg = params.get("msg") or {}
-        msg_type = (msg.get("type") or "").lower()
+        msg_type = msg.get("type") or ""
+        if msg_type in CODEX_QUIET_EVENT_TYPES:
+            return
+        if not msg_type.islower():
+            msg_type = msg_type.lower()
+            if msg_type in CODEX_QUIET_EVENT_TYPES:
+                return
         conv_id = str(
             params.get("conversation_id")
             or params.get("conversationId")
@@ -398,38 +706,36 @@ class Hub:
             or ""
         )
 
-        if msg_type == "agent_message":
-            text = self._extract_codex_message_text(msg.get("message"))
-            if not text:
-                return
-            await self._handle_assistant_message({"text": text, "conversation_id": conv_id})
+        handler = self._codex_handlers.get(msg_type)
+        if handler is not None:
+            await handler(msg_type, msg, conv_id)
             return
 
-        if msg_type == "task_started":
-            target = self._name_for_params({"conversation_id": conv_id}) or "agent"
-            message = msg.get("message") or msg.get("status") or "Working"
-            await self._broadcast({"who": target, "type": "task_started", "payload": {"text": message}})
-            await self._set_state(target, "working")
-            return
+        self._broadcast({"who": "app-server", "type": "misc", "payload": {"method": method, "params": params}})
 
-        if msg_type == "task_complete":
-            target = self._name_for_params({"conversation_id": conv_id}) or "agent"
-            await self._set_state(target, "idle")
-            final = msg.get("last_agent_message") or msg.get("message") or ""
-            if target != "orchestrator" and final:
-                await self._handle_sub_complete(target, final)
-            return
-
-        if msg_type in {"exec_command_begin", "exec_command_end", "exec_command_output_delta"}:
-            target = self._name_for_params({"conversation_id": conv_id}) or "agent"
-            summary = msg.get("command") or msg.get("output") or msg_type.replace("_", " ")
-            await self._broadcast({"who": target, "type": "status", "payload": {"text": str(summary)}})
-            return
-
-        if msg_type in {"token_count", "agent_reasoning", "agent_reasoning_delta", "agent_reasoning_section_break"}:
+    async def _on_codex_agent_message(self, msg_type: str, msg: Dict[str, Any], conv_id: str) -> None:
+        text = self._extract_codex_message_text(msg.get("message"))
+        if not text:
             return
-
-        await self._broadcast({"who": "app-server", "type": "misc", "payload": {"method": method, "params": params}})
+        await self._dispatch_assistant_text(conv_id, text)
+
+    async def _on_codex_task_started(self, msg_type: str, msg: Dict[str, Any], conv_id: str) -> None:
+        target = self._name_for_params({"conversation_id": conv_id}) or "agent"
+        message = msg.get("message") or msg.get("status") or "Working"
+        self._broadcast({"who": target, "type": "task_started", "payload": {"text": message}})
+        await self._set_state(target, "working")
+
+    async def _on_codex_task_complete(self, msg_type: str, msg: Dict[str, Any], conv_id: str) -> None:
+        target = self._name_for_params({"conversation_id": conv_id}) or "agent"
+        await self._set_state(target, "idle")
+        final = msg.get("last_agent_message") or msg.get("message") or ""
+        if target != "orchestrator" and final:
+            await self._handle_sub_complete(target, final)
+
+    async def _on_codex_exec(self, msg_type: str, msg: Dict[str, Any], conv_id: str) -> None:
+        target = self._name_for_params({"conversation_id": conv_id}) or "agent"
+        summary = msg.get("command") or msg.get("output") or msg_type.replace("_", " ")
+        self._broadcast({"who": target, "type": "status", "payload": {"text": str(summary)}})
 
     def _extract_codex_message_text(self, message: Any) -> Optional[str]:
         if isinstance(message, str):
@@ -438,65 +744,152 @@ class Hub:
             text = message.get("text")
             if isinstance(text, str):
                 return text
-            content = message.get("content")
-            if isinstance(content, list):
-                parts = [
-                    item.get("text")
-                    for item in content
-                    if isinstance(item, dict) and isinstance(item.get("text"), str)
-                ]
-                return "\n".join(parts) if parts else None
-        if isinstance(message, list):
-            parts = []
-            for item in message:
-                if isinstance(item, str):
-                    parts.append(item)
-                elif isinstance(item, dict):
-                    text = item.get("text")
-                    if isinstance(text, str):
-                        parts.append(text)
-            return "\n".join(parts) if parts else None
-        return None
+            items = message.get("content")
+            if not isinstance(items, list):
+                return None
+            allow_bare = False
+        elif isinstance(message, list):
+            items = message
+            allow_bare = True
+        else:
+            return None
+        # One pass over the items; bare strings only count in a top-level list.
+        parts: List[str] = []
+        for item in items:
+            if isinstance(item, dict):
+                text = item.get("text")
+            elif allow_bare:
+                text = item
+            else:
+                continue
+            if isinstance(text, str):
+                parts.append(text)
+        if not parts:
+            return None
+        return parts[0] if len(parts) == 1 else "\n".join(parts)
 
     async def _handle_assistant_message(self, params: Dict[str, Any]) -> None:
         text = self._extract_text(params)
         if not text:
             return
         conv_id = str(params.get("conversation_id") or params.get("session_id") or "")
-        name_for_heartbeat = self._conv_to_name.get(conv_id)
-        if name_for_heartbeat:
-            meta = self.agent_meta.get(name_for_heartbeat)
-            if meta:
-                meta.last_event_at = time.time()
+        await self._dispatch_assistant_text(conv_id, text)
+
+    async def _dispatch_assistant_text(self, conv_id: str, text: str) -> None:
+        row = self._by_conv.get(conv_id)
+        if row:
+            row.meta.last_event_at = self._now
         if self.orchestrator and conv_id == self.orchestrator.conversation_id:
             await self._handle_orchestrator_text(text)
             await self._set_state("orchestrator", "idle")
             return
-        agent_name = self._conv_to_name.get(conv_id)
-        if agent_name:
-            await self._broadcast({"who": agent_name, "type": "agent_to_orch", "payload": {"text": text}})
-            root = self.repo_path
-            art_id = None
-            try:
-                art_id = artifacts.store_text(root, "agent_message", text, meta={"agent": agent_name})
-            except Exception:
-                art_id = None
-            agent = self.subs.get(agent_name)
-            if agent:
-                summary = (text.strip().splitlines() or [""])[0][:300]
-                agent.last_artifact_id = art_id
-                agent.last_summary = summary or agent.last_summary
-                agent.last_checkin_ts = time.time()
+        if row:
+            agent_name = row.name
+            self._broadcast({"who": agent_name, "type": "agent_to_orch", "payload": {"text": text}})
+            self._buffer_agent_message(agent_name, text)
+            agent = row.agent
+            summary = (text.strip().splitlines() or [""])[0][:300]
+            agent.last_summary = summary or agent.last_summary
+            agent.last_checkin_ts = self._now
             self.last_checkin[agent_name] = 0
             self._mark_dirty(agent_name)
             await self._maybe_send_digest(reason="agent_message")
         else:
-            await self._broadcast({"who": "agent", "type": "agent_to_orch", "payload": {"text": text}})
+            self._broadcast({"who": "agent", "type": "agent_to_orch", "payload": {"text": text}})
+
+    def _buffer_agent_message(self, name: str, text: str) -> None:
+        """Queue ``text`` for ``name``'s next message artifact, flushed once the burst goes quiet."""
+        self._pending_messages.setdefault(name, []).append(text)
+        handle = self._message_flush.pop(name, None)
+        if handle:
+            handle.cancel()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._flush_agent_messages(name)
+            return
+        self._message_flush[name] = loop.call_later(
+            AGENT_MESSAGE_COALESCE_S, self._flush_agent_messages, name
+        )
+
+    def _flush_agent_messages(self, name: str) -> None:
+        handle = self._message_flush.pop(name, None)
+        if handle:
+            handle.cancel()
+        texts = self._pending_messages.pop(name, None)
+        if not texts:
+            return
+        self._queue_artifact(name, "agent_message", "\n\n".join(texts))
+
+    def _queue_artifact(self, name: str, kind: str, text: str) -> None:
+        self._pending_artifacts.append((name, kind, text))
+        if self._artifact_drain is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._drain_artifacts()
+            return
+        self._artifact_drain = loop.call_soon(self._drain_artifacts)
+
+    def _drain_artifacts(self) -> None:
+        """Hand every queued artifact to the artifact thread as one batch."""
+        if self._artifact_drain is not None:
+            self._artifact_drain.cancel()
+            self._artifact_drain = None
+        pending = self._pending_artifacts
+        if not pending:
+            return
+        self._pending_artifacts = []
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._record_artifact_ids(pending, _store_artifacts(self.repo_path, pending))
+            return
+        future = loop.run_in_executor(self._artifact_exec, _store_artifacts, self.repo_path, pending)
+        future.add_done_callback(functools.partial(self._on_artifacts_stored, pending))
+        self._artifact_write = future
+
+    def _on_artifacts_stored(self, batch: List[Tuple[str, str, str]], future: asyncio.Future) -> None:
+        if self._artifact_write is future:
+            self._artifact_write = None
+        if future.cancelled() or future.exception() is not None:
+            ids: List[Optional[str]] = [None] * len(batch)
+        else:
+            ids = future.result()
+        self._record_artifact_ids(batch, ids)
+
+    def _record_artifact_ids(self, batch: List[Tuple[str, str, str]], ids: List[Optional[str]]) -> None:
+        for (name, _kind, _text), art_id in zip(batch, ids):
+            agent = self.subs.get(name)
+            if agent:
+                agent.last_artifact_id = art_id
+
+    async def _settle_artifacts(self, names: Optional[List[str]] = None) -> None:
+        """Store buffered messages for ``names`` and wait until every queued artifact is written."""
+        for name in names or ():
+            self._flush_agent_messages(name)
+        self._drain_artifacts()
+        future = self._artifact_write
+        if future is not None:
+            # Batches run in order on one thread, so the newest covers the rest.
+            await asyncio.wait([future])
 
     def _extract_text(self, params: Dict[str, Any]) -> Optional[str]:
-        if isinstance(params.get("text"), str):
-            return params["text"]
-        items = params.get("items") or params.get("deltas") or []
+        text = params.get("text")
+        if isinstance(text, str):
+            return text
+        items = params.get("items") or params.get("deltas")
+        if not items:
+            return None
+        if isinstance(items, list) and len(items) == 1:
+            # Streaming deltas almost always carry a single item.
+            item = items[0]
+            if isinstance(item, dict) and item.get("type") in TEXT_ITEM_TYPES:
+                text = item.get("text")
+                if isinstance(text, str):
+                    return text
+            return None
         parts: List[str] = []
         for item in items:
             if isinstance(item, dict) and item.get("type") in TEXT_ITEM_TYPES:
@@ -511,13 +904,13 @@ class Hub:
             return None
         if self.orchestrator and conv_id == self.orchestrator.conversation_id:
             return "orchestrator"
-        return self._conv_to_name.get(conv_id)
+        row = self._by_conv.get(conv_id)
+        return row.name if row else None
 
     async def _handle_orchestrator_text(self, text: str) -> None:
-        blocks = extract_control_blocks(text)
-        display_text = strip_control_blocks(text)
+        display_text, blocks = parse_orchestrator_text(text)
         if display_text:
-            await self._broadcast({"who": "orchestrator", "type": "orch_to_user", "payload": {"text": display_text}})
+            self._broadcast({"who": "orchestrator", "type": "orch_to_user", "payload": {"text": display_text}})
         if not blocks:
             return
         for block in blocks:
@@ -526,7 +919,7 @@ class Hub:
     async def _handle_control_block(self, block: Dict[str, Any]) -> None:
         if not self.autopilot_enabled:
             summary = next(iter(block), "control")
-            await self._broadcast(
+            self._broadcast(
                 {
                     "who": "orchestrator",
                     "type": "autopilot_suppressed",
@@ -553,7 +946,7 @@ class Hub:
                 f"stdout:\n{result.stdout}\n"
                 f"\nstderr:\n{result.stderr}"
             )
-            await self._broadcast({"who": "orchestrator", "type": "orch_to_user", "payload": {"text": body}})
+            self._broadcast({"who": "orchestrator", "type": "orch_to_user", "payload": {"text": body}})
             if not result.ok:
                 await self._send_orch(f"HUB: exec command failed with exit code {result.code}.")
             return
@@ -563,7 +956,7 @@ class Hub:
             issue = spec.get("issue")
             text_body = (spec.get("text") or "").strip()
             scope = f"issue#{issue}" if issue else "project"
-            await self._broadcast({"who": "hub", "type": "status_posted", "payload": {"scope": scope, "text": text_body}})
+            self._broadcast({"who": "hub", "type": "status_posted", "payload": {"scope": scope, "text": text_body}})
             if ghx is not None and issue and text_body:
                 try:
                     ghx.comment_issue(self.repo_path, int(issue), text_body)
@@ -589,7 +982,7 @@ class Hub:
                     event = {"type": "ARTIFACT_ERROR", "id": art_id, "error": str(exc)}
                     note = f"Artifact {art_id} not available ({exc})"
                 self._orch_extra_blocks.append(event)
-                await self._broadcast({"who": "hub", "type": "artifact_note", "payload": {"note": note}})
+                self._broadcast({"who": "hub", "type": "artifact_note", "payload": {"note": note}})
                 self._ensure_digest_timer()
                 await self._maybe_send_digest(reason="fetch")
             return
@@ -604,7 +997,7 @@ class Hub:
                     f"HUB: WIP limit {self.wip_limit} reached; please close an agent before spawning '{name}'."
                 )
                 return
-            await self._broadcast(
+            self._broadcast(
                 {
                     "who": "orchestrator",
                     "type": "orch_to_agent",
@@ -618,7 +1011,7 @@ class Hub:
             spec = block["send"]
             name = spec.get("to")
             task = spec.get("task") or ""
-            await self._broadcast(
+            self._broadcast(
                 {
                     "who": "orchestrator",
                     "type": "orch_to_agent",
@@ -631,7 +1024,7 @@ class Hub:
         if "close" in block:
             spec = block["close"]
             name = spec.get("agent")
-            await self._broadcast(
+            self._broadcast(
                 {
                     "who": "orchestrator",
                     "type": "orch_to_agent",
@@ -642,18 +1035,13 @@ class Hub:
             return
 
     async def _handle_sub_complete(self, name: str, final: str) -> None:
-        root = self.repo_path
-        art_id = None
-        try:
-            art_id = artifacts.store_text(root, "agent_complete", final, meta={"agent": name})
-        except Exception:
-            art_id = None
+        self._flush_agent_messages(name)
+        self._queue_artifact(name, "agent_complete", final)
         agent = self.subs.get(name)
         if agent:
             summary = (final.strip().splitlines() or [""])[0][:300]
-            agent.last_artifact_id = art_id
             agent.last_summary = summary or agent.last_summary
-            agent.last_checkin_ts = time.time()
+            agent.last_checkin_ts = self._now
         self.last_checkin[name] = 0
         self._mark_dirty(name)
         await self._maybe_send_digest(reason="agent_complete")
@@ -667,11 +1055,21 @@ class Hub:
         approved = bool(self.dangerous and self.autopilot_enabled)
         decision = "approved" if approved else "denied"
 
+        try:
+            await self.app.respond(request_id, {"decision": decision})
+        except Exception:
+            return
+
         description: str
         lower = method.lower()
         if lower == "execcommandapproval":
-            command = " ".join(params.get("command", [])) if isinstance(params.get("command"), list) else ""
-            description = f"exec command {command}".strip()
+            command = params.get("command")
+            if isinstance(command, list):
+                head = " ".join(command[:APPROVAL_COMMAND_ARGS])
+                more = "…" if len(command) > APPROVAL_COMMAND_ARGS else ""
+                description = f"exec command {head}{more}".strip()
+            else:
+                description = "exec command"
         elif lower == "applypatchapproval":
             description = "apply patch"
         else:
@@ -684,12 +1082,7 @@ class Hub:
             else f"HUB: denied {description} because {denial_reason}."
         )
 
-        try:
-            await self.app.respond(request_id, {"decision": decision})
-        except Exception:
-            return
-
-        await self._broadcast({"who": "hub", "type": "status", "payload": {"text": status_text}})
+        self._broadcast({"who": "hub", "type": "status", "payload": {"text": status_text}})
 
         if not approved:
             try:
@@ -700,7 +1093,7 @@ class Hub:
                 pass
 
     async def send_to_orchestrator(self, text: str) -> None:
-        await self._broadcast({"who": "user", "type": "user_to_orch", "payload": {"text": text}})
+        self._broadcast({"who": "user", "type": "user_to_orch", "payload": {"text": text}})
         await self._send_orch(text)
 
     async def _send_orch(self, text: str) -> None:
@@ -720,9 +1113,8 @@ class Hub:
             )
             await self._send_orch(f"HUB: sub-agent '{key}' already exists; forwarded new task.")
             return
-        sys_message = SUBAGENT_SYSTEM_TEMPLATE.format(name=key)
         initial = [
-            {"type": "text", "text": f"{FALLBACK_SYSTEM_PREFIX}{sys_message}"},
+            {"type": "text", "text": subagent_initial_text(key)},
             {"type": "text", "text": task_text},
         ]
         workspace = cwd or self.default_cwd or os.getcwd()
@@ -731,19 +1123,21 @@ class Hub:
             model=self.model,
             initial_messages=initial,
         )
+        now = time.monotonic()
         agent = Agent(name=key, conversation_id=conv_id, state="idle")
-        self.subs[key] = agent
-        self._conv_to_name[conv_id] = key
-        self.agent_state[key] = "idle"
-        self.agent_meta[key] = AgentMeta(
-            started_at=time.time(),
-            last_event_at=time.time(),
+        meta = AgentMeta(
+            started_at=now,
+            last_event_at=now,
             checkin_seconds=self.default_checkin_seconds,
             budget_seconds=self.default_budget_seconds,
             workspace=workspace,
         )
-        await self._broadcast({"who": key, "type": "agent_added", "payload": {"agent": key}})
-        await self._broadcast({"who": key, "type": "agent_state", "payload": {"agent": key, "state": "idle"}})
+        self.subs[key] = agent
+        self._by_conv[conv_id] = AgentRow(name=key, agent=agent, meta=meta)
+        self.agent_state[key] = "idle"
+        self.agent_meta[key] = meta
+        self._broadcast({"who": key, "type": "agent_added", "payload": {"agent": key}})
+        self._broadcast({"who": key, "type": "agent_state", "payload": {"agent": key, "state": "idle"}})
         await self._send_orch(f"HUB: spawned sub-agent '{key}'.")
         self.last_checkin[key] = -1
         self._mark_dirty(key)
@@ -758,24 +1152,25 @@ class Hub:
         await self.app.send_message(agent.conversation_id, items=[{"type": "text", "text": task_text}])
         meta = self.agent_meta.get(key)
         if meta:
-            meta.last_event_at = time.time()
+            meta.last_event_at = time.monotonic()
         await self._send_orch(f"HUB: forwarded instruction to '{key}'.")
 
     async def close_sub(self, name: Optional[str]) -> None:
         key = normalise_agent_name(name)
+        self._flush_agent_messages(key)
         agent = self.subs.pop(key, None)
         if not agent:
             await self._send_orch(f"HUB: no such sub-agent '{name}'.")
             return
         self.agent_state.pop(key, None)
         self._stderr_buf.pop(key, None)
-        self._conv_to_name.pop(agent.conversation_id, None)
+        self._by_conv.pop(agent.conversation_id, None)
         self.agent_meta.pop(key, None)
         self.last_checkin.pop(key, None)
-        to_remove = [issue for issue, holder in self.issue_to_agent.items() if holder == key]
-        for issue in to_remove:
-            self.issue_to_agent.pop(issue, None)
-        await self._broadcast({"who": key, "type": "agent_removed", "payload": {"agent": key}})
+        for issue in self.agent_to_issues.pop(key, ()):
+            if self.issue_to_agent.get(issue) == key:
+                del self.issue_to_agent[issue]
+        self._broadcast({"who": key, "type": "agent_removed", "payload": {"agent": key}})
         await self._send_orch(f"HUB: closed sub-agent '{key}'.")
 
     async def _set_state(self, agent: str, state: str) -> None:
@@ -783,44 +1178,132 @@ class Hub:
         if prev == state:
             return
         self.agent_state[agent] = state
-        await self._broadcast({"who": agent, "type": "agent_state", "payload": {"agent": agent, "state": state}})
+        self._broadcast({"who": agent, "type": "agent_state", "payload": {"agent": agent, "state": state}})
         if agent != "orchestrator":
             self._mark_dirty(agent)
             await self._maybe_send_digest(reason="state_change")
 
-    async def _broadcast(self, payload: Dict[str, Any]) -> None:
-        dead: List[asyncio.Queue] = []
+    def _broadcast(self, payload: Dict[str, Any]) -> None:
+        """Record ``payload`` and publish it to subscribers without yielding.
+
+        The event is appended once to the shared ring; a subscriber more than
+        EVENT_RING_SIZE events behind loses the oldest ones rather than
+        blocking the hub. ``payload`` becomes the event itself (gaining a
+        ``seq`` key), so callers must pass a fresh dict and not reuse it.
+        """
         self._sequence += 1
-        event = dict(payload)
+        event = payload
         event["seq"] = self._sequence
+        self._event_ring.append(event)
+        self._event_log.append((self._sequence, event.get("who"), event.get("type")))
+        self._journal(event)
+        # set() wakes the current waiters; clearing makes later get() calls wait again.
+        self._new_event.set()
+        self._new_event.clear()
+
+    def _journal(self, event: Dict[str, Any]) -> None:
+        """Hand ``event`` to the journal writer task, or write it through when none is running."""
+        if self._writer_task is None:
+            self._write_state(self._journal_lines([event]))
+            return
         try:
-            who = event.get("who") or "?"
-            etype = event.get("type") or "?"
-            self._event_log.append(f"[{self._sequence:03d}] {who} {etype}")
-            with open(self._state_file, "a", encoding="utf-8") as handle:
-                handle.write(json.dumps(event, ensure_ascii=False) + "\n")
-        except Exception:
-            pass
-        for queue in list(self._subscribers):
+            self._write_q.put_nowait(event)
+        except asyncio.QueueFull:
+            # The writer is behind on disk I/O. Writing inline would block the loop and could
+            # land ahead of a batch the writer already holds, so drop and count instead.
+            self.journal_dropped += 1
+
+    async def _writer_loop(self) -> None:
+        """Own the state journal: serialise queued events in batches and write each batch once."""
+        queue = self._write_q
+        reported_drops = 0
+        finished = False
+        while not finished:
+            event = await queue.get()
+            batch: List[Dict[str, Any]] = []
+            if event is None:
+                finished = True
+            else:
+                batch.append(event)
+            while not finished and len(batch) < STATE_WRITE_BATCH:
+                try:
+                    event = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if event is None:
+                    finished = True
+                else:
+                    batch.append(event)
+            if self.journal_dropped != reported_drops:
+                # Note the loss in the journal; the missing seq numbers show where it happened.
+                batch.append({"who": "hub", "type": "journal_dropped", "payload": {"total": self.journal_dropped}})
+                reported_drops = self.journal_dropped
+            if batch:
+                await asyncio.to_thread(self._write_state, self._journal_lines(batch))
+
+    @staticmethod
+    def _journal_lines(events: List[Dict[str, Any]]) -> bytes:
+        lines: List[bytes] = []
+        for event in events:
             try:
-                queue.put_nowait(event)
-            except Exception:
-                dead.append(queue)
-        for queue in dead:
-            self._subscribers.discard(queue)
+                lines.append(_jsonl_line(event))
+            except (TypeError, ValueError):
+                continue
+        return b"".join(lines)
+
+    def _write_state(self, data: bytes) -> None:
+        """Append ``data`` to the journal in one write, rolling over past STATE_JOURNAL_MAX_BYTES."""
+        if not data:
+            return
+        with self._state_lock:
+            if self._state_bytes >= STATE_JOURNAL_MAX_BYTES:
+                # Keep one previous generation so disk use stays bounded too.
+                self._close_state()
+                try:
+                    os.replace(self._state_file, self._state_file + ".1")
+                except FileNotFoundError:
+                    pass  # removed or rotated externally: already rolled
+                except OSError:
+                    pass  # keep appending rather than retrying the rollover on every write
+                self._state_bytes = 0
+            try:
+                if self._state_fh is None:
+                    self._state_fh = open(self._state_file, "ab", buffering=1 << 16)
+                self._state_fh.write(data)
+                self._state_fh.flush()
+            except OSError:
+                return
+            self._state_bytes += len(data)
+
+    def _close_state(self) -> None:
+        if self._state_fh is not None:
+            try:
+                self._state_fh.close()
+            except OSError:
+                pass
+            self._state_fh = None
 
     def _mark_dirty(self, agent: str) -> None:
         if not agent or agent == "orchestrator":
             return
-        self._orch_dirty.add(agent)
+        if agent not in self._orch_dirty:
+            self._orch_dirty.add(agent)
+            self._orch_dirty_version += 1
         self._ensure_digest_timer()
 
+    def _dirty_names(self) -> List[str]:
+        """Dirty agents in name order, re-sorted only after the set changes."""
+        version, names = self._dirty_sorted_cache
+        if version != self._orch_dirty_version:
+            names = sorted(self._orch_dirty)
+            self._dirty_sorted_cache = (self._orch_dirty_version, names)
+        return names
+
     def _ensure_digest_timer(self) -> None:
         if self._digest_timer and not self._digest_timer.done():
             return
-        try:
-            loop = asyncio.get_running_loop()
-        except RuntimeError:
+        loop = self._loop
+        if loop is None or self._stopping:
             return
         self._digest_timer = loop.create_task(self._debounced_digest())
 
@@ -841,16 +1324,16 @@ class Hub:
             return
         if not self._orch_dirty and not self._orch_extra_blocks:
             return
-        now = time.time()
+        now = time.monotonic()
         if not self._orch_last_sent or (now - self._orch_last_sent) >= self.decide_debounce_s:
             await self._send_digest(reason=reason)
 
     def _build_digest_text(self) -> str:
-        lines: List[str] = ["Decision-ready digest:"]
-        events: List[Dict[str, Any]] = []
-        now = time.time()
+        lines: List[str] = [DIGEST_HEADER]
+        events: List[str] = []
+        now = time.monotonic()
 
-        for name in sorted(self._orch_dirty):
+        for name in self._dirty_names():
             agent = self.subs.get(name)
             state = self.agent_state.get(name, "unknown")
             summary = (agent.last_summary or "").strip() if agent else ""
@@ -862,13 +1345,9 @@ class Hub:
             lines.append(f"- {name} [{state}, last check-in {last_text}]")
             if summary:
                 lines.append(f'  "{summary}"')
-            event: Dict[str, Any] = {"type": "AGENT_UPDATE", "agent": name, "state": state}
             meta = self.agent_meta.get(name)
-            if meta and meta.issue_number:
-                event["issue"] = meta.issue_number
-            if artifact_id:
-                event["artifacts"] = {"last_message": artifact_id}
-            events.append(event)
+            issue = meta.issue_number if meta else None
+            events.append(agent_update_json(name, state, issue, artifact_id))
 
         extra_blocks = list(self._orch_extra_blocks)
         self._orch_extra_blocks.clear()
@@ -876,12 +1355,12 @@ class Hub:
         if len(lines) == 1:
             lines.append("- No agent updates; awaiting check-ins.")
 
-        text = "\n".join(lines)
+        parts: List[str] = ["\n".join(lines)]
         for ev in events:
-            text += "\n\n```event\n" + json.dumps(ev, ensure_ascii=False) + "\n```"
+            parts += (EVENT_BLOCK_OPEN, ev, EVENT_BLOCK_CLOSE)
         for extra in extra_blocks:
-            text += "\n\n```event\n" + json.dumps(extra, ensure_ascii=False) + "\n```"
-        return text
+            parts += (EVENT_BLOCK_OPEN, jdump(extra), EVENT_BLOCK_CLOSE)
+        return "".join(parts)
 
 
     async def _send_digest(self, reason: str, force: bool = False) -> None:
@@ -889,8 +1368,12 @@ class Hub:
             return
         if not force and not self._orch_dirty and not self._orch_extra_blocks:
             return
-        if self._digest_timer and not self._digest_timer.done():
-            self._digest_timer.cancel()
+        timer = self._digest_timer
+        # The debounce task calls in here itself; cancelling it would abort this send at the next await.
+        if timer and not timer.done() and timer is not asyncio.current_task():
+            timer.cancel()
+        # The digest cites last_artifact_id, so store any buffered or queued artifacts first.
+        await self._settle_artifacts(self._dirty_names())
         text = self._build_digest_text()
         if not text.strip():
             if not force:
@@ -898,11 +1381,12 @@ class Hub:
             text = "Decision-ready digest: (no updates)"
         await self.app.send_message(self.orchestrator.conversation_id, items=[{"type": "text", "text": text}])
         self._digest_timer = None
-        self._orch_last_sent = time.time()
-        record = {"ts": int(self._orch_last_sent), "who": "hub", "action": "digest_sent", "reason": reason}
+        self._orch_last_sent = time.monotonic()
+        record = {"ts": int(time.time()), "who": "hub", "action": "digest_sent", "reason": reason}
         self._decision_log.append(record)
-        await self._broadcast({"who": "hub", "type": "decision", "payload": record})
+        self._broadcast({"who": "hub", "type": "decision", "payload": record})
         self._orch_dirty.clear()
+        self._orch_dirty_version += 1
 
     def recent_decisions(self, count: int = 20) -> List[Dict[str, Any]]:
         if count <= 0:
@@ -913,9 +1397,10 @@ class Hub:
         try:
             while not self._stopping:
                 await asyncio.sleep(5)
-                now = time.time()
+                now = time.monotonic()
                 dirty = False
-                for name, agent in list(self.subs.items()):
+                # Nothing below awaits, so the dict cannot change while it is walked.
+                for name, agent in self.subs.items():
                     if agent.last_checkin_ts:
                         delta = int(max(0, now - agent.last_checkin_ts))
                     else:
@@ -938,9 +1423,13 @@ class Hub:
     async def _scheduler(self) -> None:
         try:
             while not self._stopping:
-                now = time.time()
-                for name, meta in list(self.agent_meta.items()):
-                    self._maybe_update_status_comment(name)
+                now = time.monotonic()
+                # Nudges and closes await, so walk a snapshot of names and skip agents closed meanwhile.
+                for name in tuple(self.agent_meta):
+                    meta = self.agent_meta.get(name)
+                    if meta is None:
+                        continue
+                    self._maybe_update_status_comment(name, now)
                     if now - meta.last_event_at > meta.checkin_seconds and meta.nudges_sent < meta.max_nudges:
                         await self._nudge_agent(name)
                         meta.nudges_sent += 1
@@ -958,33 +1447,15 @@ class Hub:
             return
         try:
             while not self._stopping:
+                # GitHub calls block on subprocesses and the network, so they run off the loop.
                 try:
-                    issues = ghx.list_orchestrate_issues(self.repo_path, limit=50)
+                    issues = await asyncio.to_thread(ghx.list_orchestrate_issues, self.repo_path, limit=50)
                 except Exception:
                     issues = []
-                closed = {item.number for item in issues if (item.state or "").lower() == "closed"}
                 active = set(self.issue_to_agent.keys())
-                ready: List[Any] = []
-                for issue in issues:
-                    if issue.number in active or issue.number in closed:
-                        continue
-                    blockers = ghx.parse_blockers(issue.body, issue.labels)
-                    blockers = [b for b in blockers if b not in closed]
-                    if blockers:
-                        continue
-                    ready.append((issue, blockers))
-                capacity = max(0, self.wip_limit - len(self.subs)) if self.wip_limit else len(ready)
-                for issue, _ in ready[:capacity]:
-                    try:
-                        charter = ghx.parse_issue_body(issue.body)
-                        prompt = ghx.format_issue_prompt(issue, charter)
-                    except Exception:
-                        prompt = f"Work on Issue #{issue.number}: {issue.title}"
-                    prompt += (
-                        "\n\nYou have high permissions and autopilot is enabled. "
-                        "Create a small, testable branch or PR. Provide regular check-ins. "
-                        "When done, map outcomes to Acceptance and reference this issue."
-                    )
+                capacity = max(0, self.wip_limit - len(self.subs)) if self.wip_limit else None
+                ready = await asyncio.to_thread(_prepare_ready_issues, issues, active, capacity)
+                for issue, prompt in ready:
                     name = f"iss{issue.number}"
                     await self.spawn_sub(name, prompt, self.default_cwd)
                     meta = self.agent_meta.get(name)
@@ -994,12 +1465,18 @@ class Hub:
                         meta.checkin_seconds = int(sla.get("checkin_seconds", self.default_checkin_seconds))
                         meta.budget_seconds = int(sla.get("budget_seconds", self.default_budget_seconds))
                         try:
-                            comment_id = ghx.ensure_status_comment(self.repo_path, issue.number)
+                            comment_id = await asyncio.to_thread(
+                                ghx.ensure_status_comment, self.repo_path, issue.number
+                            )
                             meta.status_comment_id = comment_id
                             self._status_cache[issue.number] = comment_id
                         except Exception:
                             pass
+                    # close_sub may have run during the awaits above; indexing now would outlive it.
+                    if name not in self.subs:
+                        continue
                     self.issue_to_agent[issue.number] = name
+                    self.agent_to_issues.setdefault(name, set()).add(issue.number)
                 await asyncio.sleep(90.0)
         except asyncio.CancelledError:
             return
@@ -1008,45 +1485,66 @@ class Hub:
         agent = self.subs.get(name)
         if not agent:
             return
-        message = (
-            "Quick check-in:\n"
-            "- What is the next small step?\n"
-            "- Is anything blocking you?\n"
-            "- ETA to a minimal PR or result?"
-        )
-        await self.app.send_message(agent.conversation_id, items=[{"type": "text", "text": message}])
+        await self.app.send_message(agent.conversation_id, items=[{"type": "text", "text": NUDGE_TEXT}])
 
     async def _ask_wrap_up(self, name: str) -> None:
         agent = self.subs.get(name)
         if not agent:
             return
-        message = (
-            "Time budget reached. Please summarise status, remaining work, and immediate next actions. "
-            "If you have a branch or partial PR, share links now."
-        )
-        await self.app.send_message(agent.conversation_id, items=[{"type": "text", "text": message}])
+        await self.app.send_message(agent.conversation_id, items=[{"type": "text", "text": WRAP_UP_TEXT}])
 
-    def _maybe_update_status_comment(self, name: str) -> None:
+    def _maybe_update_status_comment(self, name: str, now: float) -> None:
         if ghx is None:
             return
         meta = self.agent_meta.get(name)
         if not meta or not meta.issue_number:
             return
-        now = time.time()
         if (now - meta.last_event_at) < 180:
             return
+        if now - meta.last_status_push_at < STATUS_PUSH_INTERVAL_S:
+            return
+        meta.last_status_push_at = now
+        body = self._render_status_comment(name, meta, now)
+        self._gh_write_q.put_nowait((meta.issue_number, name, body))
+
+    async def _github_writer_loop(self) -> None:
+        """Push queued status comments, newest body per issue, a few requests at a time."""
+        queue = self._gh_write_q
+        limit = asyncio.Semaphore(GITHUB_WRITE_CONCURRENCY)
         try:
-            comment_id = meta.status_comment_id or self._status_cache.get(meta.issue_number) or ghx.ensure_status_comment(
-                self.repo_path, meta.issue_number
-            )
-            meta.status_comment_id = comment_id
-            self._status_cache[meta.issue_number] = comment_id
-            body = self._render_status_comment(name, meta)
-            ghx.update_comment(self.repo_path, comment_id, body)
-        except Exception:
-            pass
+            while True:
+                issue_number, name, body = await queue.get()
+                latest: Dict[int, Tuple[str, str]] = {issue_number: (name, body)}
+                while True:
+                    try:
+                        issue_number, name, body = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    latest[issue_number] = (name, body)
+                await asyncio.gather(
+                    *(
+                        self._push_status_comment(limit, number, name, body)
+                        for number, (name, body) in latest.items()
+                    )
+                )
+        except asyncio.CancelledError:
+            return
+
+    async def _push_status_comment(self, limit: asyncio.Semaphore, issue_number: int, name: str, body: str) -> None:
+        async with limit:
+            meta = self.agent_meta.get(name)
+            try:
+                comment_id = (meta.status_comment_id if meta else None) or self._status_cache.get(issue_number)
+                if not comment_id:
+                    comment_id = await asyncio.to_thread(ghx.ensure_status_comment, self.repo_path, issue_number)
+                if meta:
+                    meta.status_comment_id = comment_id
+                self._status_cache[issue_number] = comment_id
+                await asyncio.to_thread(ghx.update_comment, self.repo_path, comment_id, body)
+            except Exception:
+                pass
 
-    def _render_status_comment(self, name: str, meta: AgentMeta) -> str:
+    def _render_status_comment(self, name: str, meta: AgentMeta, now: float) -> str:
         marker = "<!-- orch:status -->"
 
         def fmt_delta(seconds: float) -> str:
@@ -1055,7 +1553,6 @@ class Hub:
                 return f"{seconds // 3600}h {(seconds % 3600) // 60}m"
             return f"{seconds // 60}m"
 
-        now = time.time()
         elapsed = fmt_delta(now - meta.started_at)
         since = fmt_delta(now - meta.last_event_at)
         left = fmt_delta(max(0, meta.budget_seconds - (now - meta.started_at)))
@@ -1075,7 +1572,7 @@ class Hub:
     def render_wip_table(self) -> str:
         if not self.subs:
             return "No active sub-agents."
-        now = time.time()
+        now = time.monotonic()
         header = f"{'AGENT':<14} {'STATE':<10} {'ISSUE':<6} {'ELAPSED':<8} {'LAST':<8} {'BUDGET':<8} {'NUDGES':<6}"
         lines = [header, "-" * len(header)]
 
@@ -1099,7 +1596,9 @@ class Hub:
     def render_recent(self, count: int = 50) -> List[str]:
         if count <= 0:
             return []
-        return list(self._event_log)[-count:]
+        return [
+            f"[{seq:03d}] {who or '?'} {etype or '?'}" for seq, who, etype in list(self._event_log)[-count:]
+        ]
 
     def render_plan(self) -> str:
         if ghx is None:
@@ -1174,3 +1673,26 @@ def install_signal_handlers(loop: asyncio.AbstractEventLoop, set_event: asyncio.
             loop.add_signal_handler(sig, _handler)
         except NotImplementedError:
             pass
+
+
+def configure_event_loop(choice: Optional[str] = None, fallback: str = "default") -> str:
+    """Install the event loop named by ``choice`` or ``ORCH_EVENT_LOOP``; return the one used.
+
+    ``uvloop`` swaps in uvloop's libuv-based loop, which makes subprocess pipe I/O to the
+    app-server cheaper. ``auto`` uses uvloop when it is installed and asyncio otherwise.
+    ``default`` keeps the stdlib loop. ``fallback`` applies when neither is set.
+    """
+    name = (choice or os.environ.get("ORCH_EVENT_LOOP") or fallback).strip().lower()
+    if name in ("", "default", "asyncio"):
+        return "default"
+    if name in ("uvloop", "auto"):
+        try:
+            import uvloop  # type: ignore
+        except ImportError:
+            if name == "uvloop":
+                print("ORCH_EVENT_LOOP=uvloop but uvloop is not installed; using asyncio.", file=sys.stderr)
+            return "default"
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        return "uvloop"
+    print(f"Unknown ORCH_EVENT_LOOP '{name}'; using asyncio.", file=sys.stderr)
+    return "default"
@@ -11,7 +11,7 @@ import time
 from pathlib import Path
 from typing import Optional, Tuple
 
-from codex_hub_core import Hub, install_signal_handlers
+from codex_hub_core import Hub, configure_event_loop, install_signal_handlers
 import github_sync as ghx
 
 LABEL_ORCHESTRATE = "orchestrate"
@@ -254,6 +254,7 @@ def build_parser() -> argparse.ArgumentParser:
 
 def main() -> None:
     args = build_parser().parse_args()
+    configure_event_loop()
     try:
         asyncio.run(daemon(args))
     except KeyboardInterrupt:
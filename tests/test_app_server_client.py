@@ -0,0 +1,121 @@
+import asyncio
+import json
+import types
+import unittest
+
+import app_server_client
+from app_server_client import AppServerProcess
+
+
+class RouteFrameTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = AppServerProcess()
+
+    def test_blank_frames_ignored(self) -> None:
+        self.assertIsNone(self.app._route_frame(b""))
+        self.assertIsNone(self.app._route_frame(b"  \r"))
+
+    def test_notification_and_request(self) -> None:
+        event = self.app._route_frame(b'{"method":"codex/event/x","params":{"a":1}}')
+        self.assertEqual(
+            event,
+            {"kind": "notification", "method": "codex/event/x", "params": {"a": 1}},
+        )
+        event = self.app._route_frame(b'{"id":3,"method":"execCommandApproval"}')
+        self.assertEqual(
+            event,
+            {"kind": "request", "id": 3, "method": "execCommandApproval", "params": {}},
+        )
+
+    def test_unparseable_frame(self) -> None:
+        event = self.app._route_frame(b"not json\r")
+        self.assertEqual(event, {"kind": "unknown", "payload": "not json"})
+
+    def test_response_resolves_pending_future(self) -> None:
+        loop = asyncio.new_event_loop()
+        try:
+            fut = loop.create_future()
+            self.app._add_pending(7, fut)
+            self.assertIsNone(self.app._route_frame(b'{"id":7,"result":{"ok":true}}'))
+            self.assertEqual(fut.result(), {"id": 7, "result": {"ok": True}})
+            event = self.app._route_frame(b'{"id":8,"result":{}}')
+            self.assertEqual(event, {"kind": "response", "id": 8, "result": {}})
+        finally:
+            loop.close()
+
+    def test_colliding_slots_fall_back_to_overflow(self) -> None:
+        loop = asyncio.new_event_loop()
+        try:
+            first, second = loop.create_future(), loop.create_future()
+            rid = 5
+            clash = rid + app_server_client._PENDING_SLOTS
+            self.app._add_pending(rid, first)
+            self.app._add_pending(clash, second)
+            self.assertIs(self.app._pop_pending(clash), second)
+            self.assertIsNone(self.app._pop_pending(clash))
+            self.assertIs(self.app._pop_pending(rid), first)
+            self.assertIsNone(self.app._pop_pending("5"))
+        finally:
+            loop.close()
+
+
+class StopTests(unittest.TestCase):
+    def test_writes_after_stop_raise_instead_of_hanging(self) -> None:
+        async def scenario() -> None:
+            async def wait() -> int:
+                return 0
+
+            app = AppServerProcess()
+            app.proc = types.SimpleNamespace(stdin=types.SimpleNamespace(is_closing=lambda: True), wait=wait)
+            await app.stop()
+            with self.assertRaisesRegex(RuntimeError, "stopped"):
+                await asyncio.wait_for(app.notify("ping"), timeout=1.0)
+
+        asyncio.run(scenario())
+
+
+class EventRingTests(unittest.TestCase):
+    def test_ring_overwrites_oldest_but_keeps_requests(self) -> None:
+        app = AppServerProcess()
+        size = app_server_client._EVENT_RING_SIZE
+        app._push_event({"kind": "request", "id": 1, "method": "execCommandApproval"})
+        for idx in range(size + 3):
+            app._push_event({"kind": "stderr", "line": str(idx)})
+        app._push_event(None)
+
+        async def drain() -> list:
+            return [ev async for ev in app.events()]
+
+        events = asyncio.run(drain())
+        self.assertEqual(app.dropped_events, 3)
+        self.assertEqual(events[0]["kind"], "request")
+        self.assertEqual(events[1], {"kind": "stderr", "line": "3"})
+        self.assertEqual(len(events), size + 1)
+
+
+class FrameTemplateTests(unittest.TestCase):
+    def test_call_frame_is_valid_json_rpc(self) -> None:
+        frame = app_server_client._CALL_FRAME % (
+            12,
+            app_server_client._method_bytes('send"Message'),
+            app_server_client._encode({"text": "café"}),
+        )
+        self.assertTrue(frame.endswith(b"\n"))
+        self.assertEqual(
+            json.loads(frame),
+            {"jsonrpc": "2.0", "id": 12, "method": 'send"Message', "params": {"text": "café"}},
+        )
+
+    def test_result_frame_encodes_request_id(self) -> None:
+        frame = app_server_client._RESULT_FRAME % (
+            app_server_client._encode("req-1"),
+            app_server_client._encode({"decision": "approved"}),
+        )
+        self.assertEqual(
+            json.loads(frame),
+            {"jsonrpc": "2.0", "id": "req-1", "result": {"decision": "approved"}},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+import artifacts
+
+
+class ArtifactStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+
+    def tearDown(self) -> None:
+        artifacts.close()
+        self._tmp.cleanup()
+
+    def _index_records(self) -> list:
+        path = os.path.join(self.root, artifacts.ART_DIRNAME, artifacts.INDEX_BASENAME)
+        with open(path, "r", encoding="utf-8") as handle:
+            return [json.loads(line) for line in handle]
+
+    def test_store_and_load_round_trip(self) -> None:
+        art_id = artifacts.store_text(self.root, "agent_message", "héllo\nworld", meta={"agent": "a"})
+        text, total = artifacts.load_text(self.root, art_id)
+        self.assertEqual(text, "héllo\nworld")
+        self.assertEqual(total, len("héllo\nworld"))
+        records = self._index_records()
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["id"], art_id)
+        self.assertEqual(records[0]["meta"], {"agent": "a"})
+
+    def test_load_truncates_to_max_chars(self) -> None:
+        art_id = artifacts.store_text(self.root, "agent_complete", "abcdef")
+        self.assertEqual(artifacts.load_text(self.root, art_id, max_chars=3), ("abc", 6))
+
+    def test_ids_are_unique(self) -> None:
+        ids = {artifacts.store_text(self.root, "k", str(idx)) for idx in range(20)}
+        self.assertEqual(len(ids), 20)
+        self.assertEqual(len(self._index_records()), 20)
+
+    def test_index_writes_are_buffered_inside_event_loop(self) -> None:
+        async def scenario() -> tuple:
+            artifacts.store_text(self.root, "k", "one")
+            artifacts.store_text(self.root, "k", "two")
+            before = len(self._index_records())
+            artifacts.flush(self.root)
+            return before, len(self._index_records())
+
+        self.assertEqual(asyncio.run(scenario()), (0, 2))
+
+    def test_worker_thread_store_writes_through_while_loop_timer_pending(self) -> None:
+        async def scenario() -> tuple:
+            artifacts.store_text(self.root, "k", "loop")
+            await asyncio.to_thread(artifacts.store_text, self.root, "k", "worker")
+            after_worker = [record["kind"] for record in self._index_records()]
+            # The loop's deadline timer still fires harmlessly after the worker flushed.
+            await asyncio.sleep(artifacts._INDEX_FLUSH_DELAY * 2)
+            return after_worker, len(self._index_records())
+
+        self.assertEqual(asyncio.run(scenario()), (["k", "k"], 2))
+
+    def test_store_texts_from_executor_appends_batch_at_once(self) -> None:
+        async def scenario() -> tuple:
+            ids = await asyncio.to_thread(
+                artifacts.store_texts, self.root, [("k", "one", {"agent": "a"}), ("k", "two", None)]
+            )
+            return ids, [record["id"] for record in self._index_records()]
+
+        ids, indexed = asyncio.run(scenario())
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(indexed, ids)
+        self.assertEqual(artifacts.load_text(self.root, ids[1]), ("two", 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,188 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import codex_hub_cli
+
+
+class _FakeHub:
+    def __init__(self, **_kwargs) -> None:
+        self.stopped = False
+
+    async def start(self, seed_text: str) -> None:
+        pass
+
+    async def stop(self) -> None:
+        self.stopped = True
+
+    def subscribe(self) -> asyncio.Queue:
+        return asyncio.Queue()
+
+
+class RunCliTests(unittest.TestCase):
+    def test_unreadable_script_stops_the_cli(self) -> None:
+        hubs = []
+
+        def make_hub(**kwargs) -> _FakeHub:
+            hubs.append(_FakeHub(**kwargs))
+            return hubs[-1]
+
+        with tempfile.TemporaryDirectory() as script_dir:
+            args = argparse.Namespace(
+                codex_path="codex", dangerous=False, cwd=None, model=None, wip=3, checkin="10m",
+                budget="45m", otel_log=None, seed="", script=script_dir, no_colour=True,
+            )
+            out = io.StringIO()
+            with mock.patch.object(codex_hub_cli, "Hub", make_hub), mock.patch.object(
+                codex_hub_cli, "print_startup_context"
+            ), contextlib.redirect_stdout(out):
+                asyncio.run(asyncio.wait_for(codex_hub_cli.run_cli(args), timeout=5.0))
+        self.assertTrue(hubs[0].stopped)
+        self.assertIn("Script file could not be read", out.getvalue())
+
+
+def _state(agent: str, state: str, seq: int) -> dict:
+    return {"seq": seq, "who": agent, "type": "agent_state", "payload": {"agent": agent, "state": state}}
+
+
+class CoalesceAgentStatesTests(unittest.TestCase):
+    def test_repeated_states_are_dropped(self) -> None:
+        batch = [_state("a", "idle", 1), _state("b", "idle", 2), _state("a", "idle", 3)]
+        self.assertEqual([ev["seq"] for ev in codex_hub_cli.coalesce_agent_states(batch)], [1, 2])
+
+    def test_round_trip_keeps_every_transition(self) -> None:
+        batch = [_state("a", "idle", 1), _state("a", "working", 2), _state("a", "idle", 3)]
+        self.assertEqual(codex_hub_cli.coalesce_agent_states(batch), batch)
+
+    def test_round_trip_renders_as_changes(self) -> None:
+        printer = codex_hub_cli.PlainPrinter(codex_hub_cli.Palette(enabled=False))
+        with contextlib.redirect_stdout(io.StringIO()):
+            printer.render_batch([_state("a", "idle", 1)])
+            printer.flush()
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            printer.render_batch(
+                codex_hub_cli.coalesce_agent_states([_state("a", "working", 2), _state("a", "idle", 3)])
+            )
+            printer.flush()
+        self.assertNotIn("=", out.getvalue())
+        self.assertEqual(out.getvalue().count("→"), 2)
+
+
+TRICKY_TEXTS = [
+    "plain",
+    "a\nb",
+    "a\nb\n",
+    "a\r\nb\n\n",
+    "\n\n",
+    "tab\there\x0bvt\x0cff",
+    "sep\x1cfs\x1dgs\x1ers",
+    "nel\x85line\u2028ls\u2029ps",
+    "crlf\r\n\r\nend\r",
+    "```control\n{\"close\": \"a\"}\n```\n",
+]
+
+
+def _baseline_format_lines(text: str) -> list:
+    if not text:
+        return [""]
+    if text.lstrip().startswith("```control"):
+        return ["control payload:"] + [f"    {line}" for line in (text.splitlines() or [""])]
+    return text.splitlines()
+
+
+class LineSplittingTests(unittest.TestCase):
+    def test_split_lines_matches_splitlines(self) -> None:
+        for text in TRICKY_TEXTS:
+            with self.subTest(text=text):
+                self.assertEqual(codex_hub_cli.Printer._split_lines(text), text.splitlines())
+
+    def test_iter_lines_matches_baseline_formatting(self) -> None:
+        printer = codex_hub_cli.Printer(codex_hub_cli.Palette(enabled=False))
+        for text in TRICKY_TEXTS + [""]:
+            with self.subTest(text=text):
+                self.assertEqual(list(printer._iter_lines(text)), _baseline_format_lines(text))
+
+
+def _baseline_line(seq: int, label: str, text: str) -> str:
+    """Colour-less output of the original ``Printer.line``."""
+    width = codex_hub_cli.Printer.PREFIX_LABEL_WIDTH
+    label = label.strip()[:width]
+    prefix = f"[{seq:03d}] {label:<{width}}"
+    indent = " " * len(prefix)
+    return "".join(
+        f"{prefix if idx == 0 else indent} {body}\n" for idx, body in enumerate(_baseline_format_lines(text))
+    )
+
+
+class ColourlessLineTests(unittest.TestCase):
+    def _render(self, printer: codex_hub_cli.Printer, *args, **kwargs) -> str:
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            printer.line(*args, **kwargs)
+            printer.flush()
+        return out.getvalue()
+
+    def test_line_output_matches_baseline(self) -> None:
+        palette = codex_hub_cli.Palette(enabled=False)
+        printers = [codex_hub_cli.Printer(palette), codex_hub_cli.PlainPrinter(palette)]
+        labels = ["orch", "  user  ", "a-very-long-agent-label-that-is-truncated", ""]
+        for printer in printers:
+            for label in labels:
+                for text in TRICKY_TEXTS + [""]:
+                    for system in (False, True):
+                        with self.subTest(printer=type(printer).__name__, label=label, text=text, system=system):
+                            self.assertEqual(
+                                self._render(printer, 7, label, text, "agent", system=system),
+                                _baseline_line(7, label, text),
+                            )
+
+
+@unittest.skipUnless(os.name == "posix", "non-blocking pipes need POSIX")
+class NonBlockingStreamTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.read_fd, self.write_fd = os.pipe()
+        self.addCleanup(os.close, self.read_fd)
+        self.addCleanup(os.close, self.write_fd)
+
+    def test_write_stream_waits_out_a_full_non_blocking_pipe(self) -> None:
+        os.set_blocking(self.write_fd, False)
+        data = "x" * (1 << 20)
+        received = bytearray()
+
+        def drain() -> None:
+            time.sleep(0.05)
+            while len(received) < len(data):
+                received.extend(os.read(self.read_fd, 65536))
+
+        reader = threading.Thread(target=drain)
+        reader.start()
+        with open(self.write_fd, "w", encoding="utf-8", closefd=False) as stream:
+            codex_hub_cli._write_stream(stream, data)
+        reader.join(timeout=5.0)
+        self.assertEqual(len(received), len(data))
+
+    def test_stdin_reader_restores_blocking_mode(self) -> None:
+        class _LibuvLikeLoop:
+            def add_reader(self, fd, _callback) -> None:
+                os.set_blocking(fd, False)
+
+            def remove_reader(self, _fd) -> None:
+                pass
+
+        reader = codex_hub_cli.StdinReader(_LibuvLikeLoop(), self.read_fd)
+        reader.start()
+        self.assertFalse(os.get_blocking(self.read_fd))
+        reader.stop()
+        self.assertTrue(os.get_blocking(self.read_fd))
+
+
+if __name__ == "__main__":
+    unittest.main()
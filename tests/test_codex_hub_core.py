@@ -0,0 +1,321 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from collections import deque
+from unittest import mock
+
+import artifacts
+import codex_hub_core
+
+
+FENCED_MESSAGE = """Plan below.
+
+```control
+{"spawn": {"name": "coder", "task": "fix tests"}}
+```
+
+
+Then we wait.
+{"send": {"to": "coder", "text": "status?"}}
+"""
+
+
+class ControlBlockTests(unittest.TestCase):
+    def test_extracts_fenced_and_bare_blocks(self) -> None:
+        blocks = codex_hub_core.extract_control_blocks(FENCED_MESSAGE)
+        self.assertEqual(
+            blocks,
+            [
+                {"spawn": {"name": "coder", "task": "fix tests"}},
+                {"send": {"to": "coder", "text": "status?"}},
+            ],
+        )
+
+    def test_bare_lines_need_a_control_key(self) -> None:
+        text = 'Some prose.\n{"note": "send this later"}\n{"close": "coder"}'
+        self.assertEqual(codex_hub_core.extract_control_blocks(text), [{"close": "coder"}])
+
+    def test_duplicate_bare_block_is_reported_once(self) -> None:
+        text = '```control\n{"close": "a"}\n```\n{"close": "a"}'
+        self.assertEqual(codex_hub_core.extract_control_blocks(text), [{"close": "a"}])
+
+    def test_no_blocks_in_plain_text(self) -> None:
+        self.assertEqual(codex_hub_core.extract_control_blocks("just talking {}"), [])
+        self.assertEqual(codex_hub_core.extract_control_blocks(None), [])
+
+    def test_strip_control_blocks_removes_fences(self) -> None:
+        cleaned = codex_hub_core.strip_control_blocks(FENCED_MESSAGE)
+        self.assertNotIn("```", cleaned)
+        self.assertTrue(cleaned.startswith("Plan below.\nThen we wait."))
+
+    def test_parse_orchestrator_text_returns_both_views(self) -> None:
+        display, blocks = codex_hub_core.parse_orchestrator_text(FENCED_MESSAGE)
+        self.assertEqual(display, codex_hub_core.strip_control_blocks(FENCED_MESSAGE))
+        self.assertEqual(blocks, codex_hub_core.extract_control_blocks(FENCED_MESSAGE))
+
+
+class StateJournalTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.hub = codex_hub_core.Hub(dangerous=False, default_cwd=self._tmp.name, github_poll=False)
+        self.addCleanup(self.hub._close_state)
+        self.state_file = os.path.join(self._tmp.name, ".orch", "state.jsonl")
+
+    def test_rollover_survives_journal_deleted_externally(self) -> None:
+        with mock.patch.object(codex_hub_core, "STATE_JOURNAL_MAX_BYTES", 10):
+            self.hub._write_state(b"first line\n")
+            os.remove(self.state_file)
+            self.hub._write_state(b"second\n")
+            self.hub._write_state(b"third\n")
+        with open(self.state_file, "rb") as handle:
+            self.assertEqual(handle.read(), b"second\nthird\n")
+
+    def test_rollover_keeps_previous_generation(self) -> None:
+        with mock.patch.object(codex_hub_core, "STATE_JOURNAL_MAX_BYTES", 10):
+            self.hub._write_state(b"first line\n")
+            self.hub._write_state(b"second\n")
+        with open(self.state_file + ".1", "rb") as handle:
+            self.assertEqual(handle.read(), b"first line\n")
+        with open(self.state_file, "rb") as handle:
+            self.assertEqual(handle.read(), b"second\n")
+
+    def test_full_writer_queue_drops_and_records_the_gap(self) -> None:
+        async def scenario() -> None:
+            self.hub._write_q = asyncio.Queue(maxsize=2)
+            self.hub._writer_task = asyncio.get_running_loop().create_task(self.hub._writer_loop())
+            for _ in range(4):
+                self.hub._broadcast({"who": "hub", "type": "status", "payload": {}})
+            await self.hub._write_q.put(None)
+            await self.hub._writer_task
+
+        asyncio.run(scenario())
+        self.assertEqual(self.hub.journal_dropped, 2)
+        with open(self.state_file, "r", encoding="utf-8") as handle:
+            records = [json.loads(line) for line in handle]
+        self.assertEqual([record.get("seq") for record in records], [1, 2, None])
+        self.assertEqual(records[-1]["type"], "journal_dropped")
+
+
+class EventSubscriptionTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.hub = codex_hub_core.Hub(dangerous=False, default_cwd=self._tmp.name, github_poll=False)
+        self.addCleanup(self.hub._close_state)
+
+    def broadcast(self, count: int) -> None:
+        for _ in range(count):
+            self.hub._broadcast({"who": "hub", "type": "status", "payload": {}})
+
+    def test_overrun_subscriber_resumes_at_oldest_kept_event(self) -> None:
+        self.hub._event_ring = deque(maxlen=4)
+        slow = self.hub.subscribe()
+        self.broadcast(2)
+        late = self.hub.subscribe()
+        self.broadcast(8)
+        self.assertEqual(slow.qsize(), 4)
+        self.assertEqual(late.qsize(), 4)
+        self.assertEqual([slow.get_nowait()["seq"] for _ in range(4)], [7, 8, 9, 10])
+        self.assertTrue(slow.empty())
+        with self.assertRaises(asyncio.QueueEmpty):
+            slow.get_nowait()
+        self.broadcast(1)
+        self.assertEqual(slow.get_nowait()["seq"], 11)
+
+    def test_one_broadcast_wakes_every_waiting_subscriber(self) -> None:
+        async def scenario() -> list:
+            subs = [self.hub.subscribe() for _ in range(3)]
+            received = []
+            for _round in range(2):
+                waiters = [asyncio.create_task(sub.get()) for sub in subs]
+                await asyncio.sleep(0)
+                self.assertFalse(any(waiter.done() for waiter in waiters))
+                self.broadcast(1)
+                # Cleared again at once, so the next get() waits instead of spinning.
+                self.assertFalse(self.hub._new_event.is_set())
+                events = await asyncio.wait_for(asyncio.gather(*waiters), timeout=1.0)
+                received.append([event["seq"] for event in events])
+            return received
+
+        self.assertEqual(asyncio.run(scenario()), [[1, 1, 1], [2, 2, 2]])
+
+
+class _FakeApp:
+    """Stands in for AppServerProcess; records every message sent."""
+
+    def __init__(self) -> None:
+        self.sent = []
+        self._conversations = 0
+
+    async def create_conversation(self, **_kwargs) -> str:
+        self._conversations += 1
+        return f"conv-{self._conversations}"
+
+    async def send_message(self, conversation_id: str, items) -> None:
+        self.sent.append((conversation_id, items[0]["text"]))
+
+
+class HubScenarioTest(unittest.TestCase):
+    """Runs a coroutine against a Hub wired to _FakeApp, with an orchestrator and no GitHub."""
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.hub = codex_hub_core.Hub(dangerous=False, default_cwd=self._tmp.name, github_poll=False)
+        self.addCleanup(self.hub._artifact_exec.shutdown)
+        self.addCleanup(self.hub._close_state)
+        self.app = _FakeApp()
+        self.hub.app = self.app
+        self.hub.orchestrator = codex_hub_core.Agent(name="orchestrator", conversation_id="orch")
+
+    def run_hub(self, scenario) -> None:
+        async def wrapper() -> None:
+            self.hub._loop = asyncio.get_running_loop()
+            try:
+                await scenario()
+            finally:
+                if self.hub._digest_timer:
+                    self.hub._digest_timer.cancel()
+                for handle in self.hub._message_flush.values():
+                    handle.cancel()
+
+        asyncio.run(wrapper())
+
+    def digests(self) -> list:
+        return [text for conv, text in self.app.sent if conv == "orch" and text.startswith(codex_hub_core.DIGEST_HEADER)]
+
+
+class DigestTests(HubScenarioTest):
+    def test_debounced_digest_fires_while_message_is_buffered(self) -> None:
+        self.hub.decide_debounce_s = 0.05
+
+        async def scenario() -> None:
+            await self.hub.spawn_sub("coder", "fix tests", None)
+            self.assertEqual(len(self.digests()), 1)
+            await self.hub._dispatch_assistant_text("conv-1", "working on it")
+            self.assertIn("coder", self.hub._pending_messages)
+            # The debounce (0.05 s) ends inside the message coalesce window (0.25 s).
+            await asyncio.sleep(0.15)
+            self.assertEqual(len(self.digests()), 2)
+            self.assertEqual(self.hub._orch_dirty, set())
+            self.assertNotIn("coder", self.hub._pending_messages)
+
+        self.run_hub(scenario)
+        self.assertIn(self.hub.subs["coder"].last_artifact_id, self.digests()[-1])
+
+
+class AgentMessageCoalesceTests(HubScenarioTest):
+    def setUp(self) -> None:
+        super().setUp()
+        # Keep the debounced digest out of the way; it would settle the buffer early.
+        self.hub.decide_debounce_s = 60.0
+        patcher = mock.patch.object(codex_hub_core, "AGENT_MESSAGE_COALESCE_S", 0.05)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stored_text(self, name: str) -> str:
+        return artifacts.load_text(self._tmp.name, self.hub.subs[name].last_artifact_id)[0]
+
+    def test_messages_within_the_window_share_one_artifact(self) -> None:
+        async def scenario() -> None:
+            await self.hub.spawn_sub("coder", "fix tests", None)
+            await self.hub._dispatch_assistant_text("conv-1", "first")
+            await asyncio.sleep(0.02)
+            await self.hub._dispatch_assistant_text("conv-1", "second")
+            self.assertIsNone(self.hub.subs["coder"].last_artifact_id)
+            await asyncio.sleep(0.15)
+            self.assertEqual(self.stored_text("coder"), "first\n\nsecond")
+            merged = self.hub.subs["coder"].last_artifact_id
+            await self.hub._dispatch_assistant_text("conv-1", "third")
+            await asyncio.sleep(0.15)
+            self.assertNotEqual(self.hub.subs["coder"].last_artifact_id, merged)
+            self.assertEqual(self.stored_text("coder"), "third")
+
+        self.run_hub(scenario)
+
+
+class ArtifactDrainTests(HubScenarioTest):
+    def setUp(self) -> None:
+        super().setUp()
+        self.hub.decide_debounce_s = 60.0
+        self.batches = []
+        store = codex_hub_core._store_artifacts
+
+        def recording_store(root, batch):
+            self.batches.append(list(batch))
+            return store(root, batch)
+
+        patcher = mock.patch.object(codex_hub_core, "_store_artifacts", recording_store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_artifacts_queued_in_one_tick_are_stored_as_one_batch(self) -> None:
+        async def scenario() -> None:
+            await self.hub.spawn_sub("coder", "fix tests", None)
+            await self.hub.spawn_sub("tester", "run tests", None)
+            self.hub._queue_artifact("coder", "agent_complete", "coder done")
+            self.hub._queue_artifact("tester", "agent_complete", "tester done")
+            self.assertEqual(self.batches, [])
+            await self.hub._settle_artifacts()
+
+        self.run_hub(scenario)
+        self.assertEqual(
+            self.batches,
+            [[("coder", "agent_complete", "coder done"), ("tester", "agent_complete", "tester done")]],
+        )
+        for name in ("coder", "tester"):
+            art_id = self.hub.subs[name].last_artifact_id
+            self.assertEqual(artifacts.load_text(self._tmp.name, art_id)[0], f"{name} done")
+
+    def test_digest_cites_the_settled_artifact(self) -> None:
+        async def scenario() -> None:
+            await self.hub.spawn_sub("coder", "fix tests", None)
+            await self.hub._dispatch_assistant_text("conv-1", "tests pass")
+            self.assertIsNone(self.hub.subs["coder"].last_artifact_id)
+            await self.hub.decide_now()
+
+        self.run_hub(scenario)
+        art_id = self.hub.subs["coder"].last_artifact_id
+        self.assertIsNotNone(art_id)
+        self.assertEqual(artifacts.load_text(self._tmp.name, art_id)[0], "tests pass")
+        event = json.loads(self.digests()[-1].split(codex_hub_core.EVENT_BLOCK_OPEN, 1)[1].split("\n```", 1)[0])
+        self.assertEqual(event["artifacts"], {"last_message": art_id})
+
+
+@unittest.skipIf(codex_hub_core.ghx is None, "github_sync is not importable")
+class GitHubPollTests(HubScenarioTest):
+    def test_agent_closed_during_poll_leaves_no_issue_index(self) -> None:
+        ghx = codex_hub_core.ghx
+        issue = ghx.IssueDetails(number=7, title="Fix", state="open", url="", labels=[])
+
+        async def scenario() -> None:
+            loop = asyncio.get_running_loop()
+            closed = asyncio.Event()
+
+            def ensure_status_comment(_repo, _number):
+                # Runs in the poller's worker thread while it awaits.
+                asyncio.run_coroutine_threadsafe(self.hub.close_sub("iss7"), loop).result()
+                loop.call_soon_threadsafe(closed.set)
+                return 99
+
+            with mock.patch.object(ghx, "list_orchestrate_issues", return_value=[issue]), mock.patch.object(
+                ghx, "ensure_status_comment", ensure_status_comment
+            ):
+                poller = asyncio.create_task(self.hub._poll_github())
+                await asyncio.wait_for(closed.wait(), timeout=5.0)
+                for _ in range(5):
+                    await asyncio.sleep(0)
+                poller.cancel()
+                await poller
+
+        self.run_hub(scenario)
+        self.assertNotIn("iss7", self.hub.subs)
+        self.assertEqual(self.hub.issue_to_agent, {})
+        self.assertEqual(self.hub.agent_to_issues, {})
+
+
+if __name__ == "__main__":
+    unittest.main()